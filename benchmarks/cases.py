@@ -0,0 +1,380 @@
+"""
+Benchmarks of the permissions hot paths, built from the generated data.
+"""
+import copy
+import threading
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Group as AuthGroup
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import Q
+from django.test import RequestFactory
+
+from humanresources.models import Contract
+from humanresources.models import ContractFile
+from permissions.backends import AUTH_ATTR
+from permissions.backends import CachedModelBackend
+from permissions.backends import get_user_auth
+from permissions.backends import invalidate_user_auth
+from permissions.models import EffectivePermission
+from permissions.models import Permission as RankedPermission
+from permissions.profile_sync import PROFILE_NAME_PREFIX
+from permissions.views import media_access
+
+
+# Users and files cycled through by the iterations
+SAMPLE_SIZE = 50
+
+# Iterations of the benchmarks running whole commands
+COMMAND_REPEAT = 3
+
+
+class Benchmark:
+    """A measured operation. `run(i)` is timed, `setup(i)` and `teardown(i)`
+    run before and after it in each iteration. The benchmarks with a
+    `max_repeat` run without warmup, at most `max_repeat` times.
+    """
+
+    def __init__(self, name, run, setup=None, teardown=None, max_repeat=None):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.teardown = teardown
+        self.max_repeat = max_repeat
+
+
+class RolledBack:
+    """Runs each iteration in a transaction rolled back after it, so the
+    benchmarks writing to the database always start from the same data.
+    """
+
+    def __init__(self, prepare=None):
+        self.prepare = prepare
+        self.atomic = None
+
+    def setup(self, i):
+        self.atomic = transaction.atomic()
+        self.atomic.__enter__()
+        if self.prepare is not None:
+            self.prepare(i)
+
+    def teardown(self, i):
+        transaction.set_rollback(True)
+        self.atomic.__exit__(None, None, None)
+        # the caches may refer to the rolled back rows
+        cache.clear()
+
+
+def _regular_users():
+    """Users without global profiles."""
+    return User.objects.filter(is_superuser=False).exclude(groups__name__in=[
+        settings.PROFILE_HUMAN_RESOURCES,
+        settings.APP_PROFILE_ALL_ORDERS,
+    ])
+
+
+###############################################################################
+# Media files
+###############################################################################
+
+def _get(user, path):
+    request = RequestFactory().get(settings.MEDIA_URL + path)
+    request.user = user
+    try:
+        media_access(request, path, document_root=settings.MEDIA_ROOT).close()
+    except PermissionDenied:
+        pass
+
+
+def media_access_benchmarks():
+    regular = _regular_users()
+
+    owned = list(
+        ContractFile.objects
+        .filter(contract__person__auth_user__in=regular)
+        .select_related('contract__person__auth_user')
+        .order_by('pk')[:SAMPLE_SIZE]
+    )
+    owned = [(f.contract.person.auth_user, f.contractfile_file.name) for f in owned]
+
+    denied = []
+    for user, _ in owned:
+        path = ContractFile.objects\
+            .exclude(Q(contract__person__auth_user=user) | Q(contract__supervisor__auth_user=user))\
+            .values_list('contractfile_file', flat=True).first()
+        denied.append((user, path))
+
+    human_resources = User.objects.filter(groups__name=settings.PROFILE_HUMAN_RESOURCES).first()
+    paths = [path for _, path in denied]
+
+    def owner(i):
+        _get(*owned[i % len(owned)])
+
+    def hr(i):
+        _get(human_resources, paths[i % len(paths)])
+
+    def other(i):
+        _get(*denied[i % len(denied)])
+
+    return [
+        Benchmark('media_access.owner', owner),
+        Benchmark('media_access.human_resources', hr),
+        Benchmark('media_access.denied', other),
+    ]
+
+
+###############################################################################
+# Ranked permissions queries
+###############################################################################
+
+def queryset_benchmarks():
+    users = list(
+        _regular_users()
+        .filter(groups__name__startswith=PROFILE_NAME_PREFIX)
+        .distinct().order_by('pk')[:SAMPLE_SIZE]
+    )
+
+    def filter_by_auth_permissions(i):
+        RankedPermission.objects.filter_by_auth_permissions(
+            users[i % len(users)], Contract, ['view']).count()
+
+    def with_auth_permissions(i):
+        RankedPermission.objects.with_auth_permissions(
+            users[i % len(users)], Contract, ['view']).count()
+
+    def list_permissions(i):
+        Contract.objects.list_permissions(users[i % len(users)]).count()
+
+    return [
+        Benchmark('filter_by_auth_permissions', filter_by_auth_permissions),
+        Benchmark('with_auth_permissions', with_auth_permissions),
+        Benchmark('contract.list_permissions', list_permissions),
+    ]
+
+
+###############################################################################
+# Effective permissions table
+###############################################################################
+
+def effective_permissions_benchmarks():
+    EffectivePermission.objects.rebuild()
+
+    users = list(
+        _regular_users()
+        .filter(groups__name__startswith=PROFILE_NAME_PREFIX)
+        .distinct().order_by('pk')[:SAMPLE_SIZE]
+    )
+    all_users = User.objects.all()
+
+    def check_joins(i):
+        RankedPermission.objects.filter_by_auth_permissions(
+            users[i % len(users)], Contract, ['view']).exists()
+
+    def check_table(i):
+        EffectivePermission.objects.for_permission(
+            users[i % len(users)], Contract, ['view']).exists()
+
+    def ranks_joins(i):
+        RankedPermission.objects.ranks_by_user(all_users, Contract, ['view'])
+
+    def ranks_table(i):
+        EffectivePermission.objects.ranks_by_user(all_users, Contract, ['view'])
+
+    def sync_user(i):
+        EffectivePermission.objects.sync_users([users[i % len(users)].pk])
+
+    rebuild = RolledBack()
+
+    return [
+        Benchmark('effective_permissions.check_joins', check_joins),
+        Benchmark('effective_permissions.check_table', check_table),
+        Benchmark('effective_permissions.ranks_by_user_joins', ranks_joins),
+        Benchmark('effective_permissions.ranks_by_user_table', ranks_table),
+        Benchmark('effective_permissions.sync_user', sync_user),
+        Benchmark('effective_permissions.rebuild', lambda i: EffectivePermission.objects.rebuild(),
+                  setup=rebuild.setup, teardown=rebuild.teardown, max_repeat=COMMAND_REPEAT),
+    ]
+
+
+###############################################################################
+# Authentication backends
+###############################################################################
+
+def _request_user(user):
+    """Copy of the user without the permissions cached on the instance,
+    as loaded by a new request.
+    """
+    user = copy.copy(user)
+    for name in ('_perm_cache', '_user_perm_cache', '_group_perm_cache', AUTH_ATTR):
+        user.__dict__.pop(name, None)
+    return user
+
+
+def auth_backend_benchmarks():
+    users = list(
+        _regular_users()
+        .filter(groups__name__startswith=PROFILE_NAME_PREFIX)
+        .distinct().order_by('pk')[:SAMPLE_SIZE]
+    )
+    model_backend, cached_backend = ModelBackend(), CachedModelBackend()
+
+    def model_has_perm(i):
+        model_backend.has_perm(_request_user(users[i % len(users)]), 'humanresources.view_contract')
+
+    def cached_has_perm(i):
+        cached_backend.has_perm(_request_user(users[i % len(users)]), 'humanresources.view_contract')
+
+    def warm(i):
+        get_user_auth(_request_user(users[i % len(users)]))
+
+    def cold(i):
+        invalidate_user_auth([users[i % len(users)].pk])
+
+    return [
+        Benchmark('auth_backend.model_has_perm', model_has_perm),
+        Benchmark('auth_backend.cached_has_perm', cached_has_perm, setup=warm),
+        Benchmark('auth_backend.cached_has_perm_cold', cached_has_perm, setup=cold),
+    ]
+
+
+###############################################################################
+# Pyforms applications
+###############################################################################
+
+def _pyforms_request(user):
+    """Install the request the pyforms widgets read from the middleware."""
+    from pyforms_web.web.middleware import PyFormsMiddleware
+    from pyforms_web.web.middleware.apps_2_update import Apps2Update
+
+    request = RequestFactory().get('/')
+    request.user = user
+    request.updated_apps = Apps2Update()
+    PyFormsMiddleware._request[threading.current_thread()] = request
+
+
+def pyforms_benchmarks():
+    from confapp import conf
+    conf += 'pyforms_web.settings'
+    conf += 'orquestra.settings'
+
+    from permissions.apps.permissions_app.permissions_form import PermissionsFormWidget
+    from permissions.apps.permissions_app.permissions_list import PermissionsListWidget
+
+    _pyforms_request(User.objects.get(username='admin'))
+
+    widgets = {}
+    ranked = list(
+        RankedPermission.objects
+        .filter(auth_group__name__startswith=PROFILE_NAME_PREFIX)
+        .order_by('pk').values_list('pk', flat=True)[:SAMPLE_SIZE]
+    )
+    outsider = _regular_users().order_by('-pk').values_list('pk', flat=True).first()
+
+    def new_list(i):
+        widgets['list'] = PermissionsListWidget()
+
+    def render_rows(i):
+        widgets['list']._list.serialize()
+
+    def new_list_cold(i):
+        cache.clear()
+        new_list(i)
+
+    def new_form(i):
+        # same arguments as PermissionsListWidget.show_edit_form
+        return PermissionsFormWidget(
+            title='Edit',
+            model=RankedPermission,
+            pk=ranked[i % len(ranked)],
+            readonly=PermissionsListWidget.READ_ONLY,
+        )
+
+    def open_form(i):
+        new_form(i)
+
+    def edit_form(i):
+        form = new_form(i)
+        form._members.value = list(form._members.value) + [outsider]
+        widgets['form'] = form
+
+    def save_form(i):
+        form = widgets['form']
+        form.save_object(form.model_object)
+
+    save = RolledBack(edit_form)
+
+    return [
+        Benchmark('permissions_list.rows', render_rows, setup=new_list_cold),
+        Benchmark('permissions_list.rows_cached', render_rows, setup=new_list),
+        Benchmark('permissions_form.open', open_form),
+        Benchmark('permissions_form.save', save_form, setup=save.setup, teardown=save.teardown),
+    ]
+
+
+###############################################################################
+# Management commands
+###############################################################################
+
+def _delete_profiles(i):
+    AuthGroup.objects.filter(name__startswith=PROFILE_NAME_PREFIX).delete()
+
+
+def command_benchmarks(workers=1):
+    def command(*args):
+        def run(i):
+            call_command(*args, stdout=StringIO())
+        return run
+
+    initial = RolledBack(_delete_profiles)
+    resync = RolledBack()
+
+    benchmarks = [
+        Benchmark('sync_permissions.initial',
+                  command('sync_permissions', '--default'),
+                  setup=initial.setup, teardown=initial.teardown, max_repeat=COMMAND_REPEAT),
+        Benchmark('sync_permissions.initial_bulk',
+                  command('sync_permissions', '--bulk', '--default'),
+                  setup=initial.setup, teardown=initial.teardown, max_repeat=COMMAND_REPEAT),
+        Benchmark('sync_permissions.resync_bulk',
+                  command('sync_permissions', '--bulk'),
+                  setup=resync.setup, teardown=resync.teardown, max_repeat=COMMAND_REPEAT),
+        Benchmark('users_permissions',
+                  command('users_permissions'),
+                  max_repeat=COMMAND_REPEAT),
+    ]
+
+    if workers > 1:
+        benchmarks.append(Benchmark(
+            f'users_permissions.workers_{workers}',
+            command('users_permissions', '--workers', str(workers)),
+            max_repeat=COMMAND_REPEAT,
+        ))
+
+    return benchmarks
+
+
+def collect(workers=1):
+    """Return the benchmarks and the (group, reason) of the groups skipped."""
+    benchmarks, skipped = [], []
+
+    groups = [
+        ('media_access', media_access_benchmarks, ()),
+        ('querysets', queryset_benchmarks, ()),
+        ('effective_permissions', effective_permissions_benchmarks, ()),
+        ('auth_backend', auth_backend_benchmarks, ()),
+        ('pyforms', pyforms_benchmarks, ()),
+        ('commands', command_benchmarks, (workers,)),
+    ]
+    for name, build, args in groups:
+        try:
+            benchmarks.extend(build(*args))
+        except ImportError as error:
+            skipped.append((name, str(error)))
+
+    return benchmarks, skipped
@@ -0,0 +1,52 @@
+"""
+Compare two results files of `run.py`:
+
+    python benchmarks/compare.py before.json after.json
+
+Exits with status 1 when the median latency of a benchmark grew more
+than the threshold, or it runs more queries.
+"""
+import argparse
+import json
+import sys
+
+
+def _load(path):
+    with open(path) as fd:
+        data = json.load(fd)
+    return {(result['size'], result['benchmark']): result for result in data['results']}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two benchmarks results files')
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=10,
+                        help='Slowdown of the median latency, in percent, reported as a regression')
+    args = parser.parse_args(argv)
+
+    before, after = _load(args.before), _load(args.after)
+
+    regressions = 0
+    print(f'{"size":8} {"benchmark":40} {"before ms":>10} {"after ms":>10} {"change":>8} {"queries":>12}')
+    for key in sorted(set(before) & set(after)):
+        old, new = before[key], after[key]
+        old_ms, new_ms = old['latency_ms']['median'], new['latency_ms']['median']
+        change = (new_ms - old_ms) / old_ms * 100 if old_ms else 0
+
+        flag = ''
+        if change > args.threshold or new['queries'] > old['queries']:
+            flag = ' !'
+            regressions += 1
+
+        queries = f'{old["queries"]:g} -> {new["queries"]:g}'
+        print(f'{key[0]:8} {key[1]:40} {old_ms:10.2f} {new_ms:10.2f} {change:+7.1f}% {queries:>12}{flag}')
+
+    for key in sorted(set(before) ^ set(after)):
+        print(f'{key[0]:8} {key[1]:40} only in {"before" if key in before else "after"}')
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Synthetic data for the benchmarks.
+"""
+import datetime
+import os
+import random
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.auth.models import Group as AuthGroup
+from django.contrib.auth.models import Permission
+from django.contrib.auth.models import User
+
+from humanresources.models import Contract
+from humanresources.models import ContractFile
+from humanresources.models import ContractProposal
+from humanresources.models import PrivateInfo
+from orders.models import Order
+from orders.models import OrderFile
+from people.models import Group as ResearchGroup
+from people.models import GroupType
+from people.models import Person
+from permissions.models import Permission as RankedPermission
+from permissions.profile_sync import PLATFORMS_GROUP_TYPE
+from permissions.profile_sync import ProfileSync
+from research.models import Publication
+
+
+Size = namedtuple('Size', ['users', 'groups', 'contracts', 'order_files'])
+
+SIZES = {
+    'small': Size(users=100, groups=10, contracts=500, order_files=500),
+    'medium': Size(users=1000, groups=40, contracts=5000, order_files=5000),
+    'large': Size(users=5000, groups=100, contracts=25000, order_files=25000),
+}
+
+# Share of the users in each profile
+PROFILE_MEMBERS_RATIO = 0.1
+HUMAN_RESOURCES_RATIO = 0.02
+ALL_ORDERS_RATIO = 0.02
+
+FILE_CONTENT = b'%PDF-1.4\n' + b'0' * 1024
+
+FIRST_NAMES = ['Ana', 'Bruno', 'Carla', 'Diogo', 'Eva', 'Filipe', 'Gil', 'Helena', 'Ines', 'Joao']
+LAST_NAMES = ['Almeida', 'Barbosa', 'Costa', 'Dias', 'Esteves', 'Ferreira', 'Gomes', 'Lopes', 'Marques', 'Silva']
+
+
+def _write_files(paths):
+    for path in paths:
+        fullpath = os.path.join(settings.MEDIA_ROOT, path)
+        os.makedirs(os.path.dirname(fullpath), exist_ok=True)
+        with open(fullpath, 'wb') as fd:
+            fd.write(FILE_CONTENT)
+
+
+def _add_members(auth_group, user_ids):
+    User.groups.through.objects.bulk_create([
+        User.groups.through(user_id=user_id, group_id=auth_group.pk)
+        for user_id in user_ids
+    ])
+
+
+def _global_profile(name, model_labels):
+    """Auth group ranked without research group, with the view permission of the models."""
+    auth_group = AuthGroup.objects.create(name=name)
+    RankedPermission.objects.create(auth_group=auth_group, researchgroup=None, ranking=1000)
+
+    codenames = ['view_' + label.split('.')[1] for label in model_labels]
+    auth_group.permissions.add(*Permission.objects.filter(codename__in=codenames))
+    return auth_group
+
+
+def generate(size, seed=0):
+    """Fill the empty database with the objects of `size`, using a fixed seed
+    so the same size always produces the same data. Returns the number of
+    rows of the main tables.
+    """
+    rng = random.Random(seed)
+    today = datetime.date(2020, 1, 1)
+
+    User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+
+    User.objects.bulk_create([
+        User(
+            username=f'user{i:05d}',
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+        )
+        for i in range(size.users)
+    ])
+    users = list(User.objects.filter(is_superuser=False).order_by('pk'))
+
+    Person.objects.bulk_create([
+        Person(
+            full_name=f'{user.first_name} {user.last_name}',
+            auth_user=user,
+            person_cv=f'uploads/person/person_cv/{i}.pdf' if i % 4 == 0 else '',
+        )
+        for i, user in enumerate(users)
+    ])
+    persons = list(Person.objects.order_by('pk'))
+    person_of = {person.auth_user_id: person for person in persons}
+
+    PrivateInfo.objects.bulk_create([
+        PrivateInfo(person=person, privateinfo_cv=f'uploads/privateinfo/privateinfo_cv/{i}.pdf')
+        for i, person in enumerate(persons) if i % 4 == 1
+    ])
+
+    # research groups, one in five is a platform, each one with a group head
+    platforms = GroupType.objects.create(grouptype_name=PLATFORMS_GROUP_TYPE)
+    labs = GroupType.objects.create(grouptype_name='Labs')
+
+    ResearchGroup.objects.bulk_create([
+        ResearchGroup(
+            group_name=f'Research Group {i:03d}',
+            grouptype=platforms if i % 5 == 0 else labs,
+            person=persons[i * len(persons) // size.groups],
+        )
+        for i in range(size.groups)
+    ])
+    research_groups = list(ResearchGroup.objects.order_by('pk'))
+
+    group_of = {person.pk: research_groups[i % len(research_groups)] for i, person in enumerate(persons)}
+    ResearchGroup.members.through.objects.bulk_create([
+        ResearchGroup.members.through(person_id=person_id, group_id=group.pk)
+        for person_id, group in group_of.items()
+    ])
+
+    # profiles of the research groups, with some of their members
+    sync = ProfileSync(ResearchGroup.objects.all(), default=True)
+    sync.plan()
+    sync.apply()
+
+    for research_group in research_groups:
+        members = [person.auth_user_id for person in persons if group_of[person.pk] == research_group]
+        chosen = rng.sample(members, int(len(members) * PROFILE_MEMBERS_RATIO))
+        profile = AuthGroup.objects.get(
+            rankedpermissions__researchgroup=research_group,
+            rankedpermissions__ranking=100,
+        )
+        head = research_group.person.auth_user_id
+        _add_members(profile, [user_id for user_id in chosen if user_id != head])
+
+    user_ids = [user.pk for user in users]
+
+    human_resources = _global_profile(settings.PROFILE_HUMAN_RESOURCES, [
+        'people.person', 'humanresources.contract', 'humanresources.contractproposal', 'orders.order',
+    ])
+    _add_members(human_resources, rng.sample(user_ids, max(1, int(len(user_ids) * HUMAN_RESOURCES_RATIO))))
+
+    all_orders = _global_profile(settings.APP_PROFILE_ALL_ORDERS, ['orders.order'])
+    _add_members(all_orders, rng.sample(user_ids, max(1, int(len(user_ids) * ALL_ORDERS_RATIO))))
+
+    # contracts supervised by the head of the person's group
+    Contract.objects.bulk_create([
+        Contract(
+            ref=f'C{i:06d}',
+            position='Researcher',
+            start=today - datetime.timedelta(days=rng.randrange(2000)),
+            person=person,
+            supervisor=group_of[person.pk].person,
+        )
+        for i, person in enumerate(rng.choice(persons) for _ in range(size.contracts))
+    ])
+    ContractFile.objects.bulk_create([
+        ContractFile(contract_id=contract_id, contractfile_file=f'uploads/contractfile/contractfile_file/{i}.pdf')
+        for i, contract_id in enumerate(Contract.objects.order_by('pk').values_list('pk', flat=True))
+    ])
+
+    ContractProposal.objects.bulk_create([
+        ContractProposal(
+            position='Researcher',
+            start=today + datetime.timedelta(days=rng.randrange(365)),
+            person=person,
+            supervisor=group_of[person.pk].person,
+        )
+        for person in (rng.choice(persons) for _ in range(size.contracts // 4))
+    ])
+
+    # one file for each order
+    Order.objects.bulk_create([
+        Order(
+            order_desc=f'Order {i:06d}',
+            order_amount=rng.randrange(10, 10000),
+            responsible=user,
+            group=group_of[person_of[user.pk].pk],
+        )
+        for i, user in enumerate(rng.choice(users) for _ in range(size.order_files))
+    ])
+    OrderFile.objects.bulk_create([
+        OrderFile(order_id=order_id, file=f'uploads/orderfile/file/{i}.pdf', createdby_id=responsible_id)
+        for i, (order_id, responsible_id) in enumerate(
+            Order.objects.order_by('pk').values_list('pk', 'responsible_id'))
+    ])
+
+    Publication.objects.bulk_create([
+        Publication(title=f'Publication {i:05d}', group=research_groups[i % len(research_groups)])
+        for i in range(size.groups * 5)
+    ])
+
+    _write_files(
+        list(ContractFile.objects.values_list('contractfile_file', flat=True)) +
+        list(OrderFile.objects.values_list('file', flat=True)) +
+        list(PrivateInfo.objects.exclude(privateinfo_cv='').values_list('privateinfo_cv', flat=True)) +
+        list(Person.objects.exclude(person_cv='').values_list('person_cv', flat=True))
+    )
+
+    return {
+        'users': User.objects.count(),
+        'research_groups': ResearchGroup.objects.count(),
+        'auth_groups': AuthGroup.objects.count(),
+        'ranked_permissions': RankedPermission.objects.count(),
+        'contracts': Contract.objects.count(),
+        'contract_files': ContractFile.objects.count(),
+        'order_files': OrderFile.objects.count(),
+    }
@@ -0,0 +1,165 @@
+"""
+Benchmarks of the permissions hot paths.
+
+Creates a SQLite database with the stub apps, fills it with synthetic data
+of each size and writes the latency, throughput and number of queries of
+each benchmark to a JSON file, to be compared with `compare.py`:
+
+    python benchmarks/run.py --sizes small medium --output after.json
+    python benchmarks/compare.py before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+sys.path[:0] = [BENCHMARKS_DIR, os.path.join(BENCHMARKS_DIR, 'stubs'), os.path.dirname(BENCHMARKS_DIR)]
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+import django  # noqa: E402
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.contenttypes.models import ContentType  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+import cases  # noqa: E402
+from generate import SIZES  # noqa: E402
+from generate import generate  # noqa: E402
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def measure(benchmark, repeat, warmup):
+    """Run the benchmark and return its statistics, the times in milliseconds."""
+    if benchmark.max_repeat is not None:
+        repeat, warmup = min(repeat, benchmark.max_repeat), 0
+
+    timings, queries = [], []
+    for i in range(-warmup, repeat):
+        if benchmark.setup is not None:
+            benchmark.setup(i)
+        try:
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                benchmark.run(i)
+                elapsed = time.perf_counter() - start
+        finally:
+            if benchmark.teardown is not None:
+                benchmark.teardown(i)
+
+        if i >= 0:
+            timings.append(elapsed)
+            queries.append(len(context.captured_queries))
+
+    return {
+        'iterations': len(timings),
+        'latency_ms': {
+            'mean': statistics.mean(timings) * 1000,
+            'median': statistics.median(timings) * 1000,
+            'p95': _percentile(timings, 95) * 1000,
+            'min': min(timings) * 1000,
+            'max': max(timings) * 1000,
+        },
+        'throughput': len(timings) / sum(timings) if sum(timings) else None,
+        'queries': statistics.mean(queries),
+    }
+
+
+def _revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=BENCHMARKS_DIR, stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _reset_database():
+    call_command('flush', interactive=False, verbosity=0)
+    ContentType.objects.clear_cache()
+    cache.clear()
+    shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the permissions hot paths')
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=['small', 'medium'],
+                        help='Sizes of the generated data')
+    parser.add_argument('--repeat', type=int, default=20, help='Iterations of each benchmark')
+    parser.add_argument('--warmup', type=int, default=1, help='Iterations run before measuring')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Processes of the parallel users_permissions benchmark, 1 to skip it')
+    parser.add_argument('--only', default=None, help='Run only the benchmarks with this text in the name')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the generated data')
+    parser.add_argument('--output', default='benchmarks.json', help='JSON file of the results')
+    parser.add_argument('--keep', action='store_true',
+                        help=f'Keep the database and media files in {settings.BENCHMARKS_DIR}')
+    args = parser.parse_args(argv)
+
+    results = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'revision': _revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'warmup': args.warmup,
+            'seed': args.seed,
+        },
+        'sizes': {},
+        'results': [],
+        'skipped': [],
+    }
+
+    try:
+        call_command('migrate', run_syncdb=True, verbosity=0)
+
+        for size in args.sizes:
+            _reset_database()
+
+            start = time.perf_counter()
+            results['sizes'][size] = generate(SIZES[size], seed=args.seed)
+            print(f'[{size}] generated in {time.perf_counter() - start:.1f}s: {results["sizes"][size]}')
+
+            benchmarks, skipped = cases.collect(workers=args.workers)
+            for group, reason in skipped:
+                print(f'[{size}] skipped {group}: {reason}')
+                results['skipped'].append({'size': size, 'group': group, 'reason': reason})
+
+            for benchmark in benchmarks:
+                if args.only and args.only not in benchmark.name:
+                    continue
+
+                result = measure(benchmark, args.repeat, args.warmup)
+                results['results'].append(dict(size=size, benchmark=benchmark.name, **result))
+                print(f'[{size}] {benchmark.name:40} '
+                      f'{result["latency_ms"]["median"]:10.2f} ms '
+                      f'{result["queries"]:8.1f} queries')
+    finally:
+        connection.close()
+        if not args.keep:
+            shutil.rmtree(settings.BENCHMARKS_DIR, ignore_errors=True)
+
+    with open(args.output, 'w') as fd:
+        json.dump(results, fd, indent=2)
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
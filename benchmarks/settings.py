@@ -0,0 +1,60 @@
+"""
+Settings of the benchmarks project: the permissions app with stub
+`people`, `humanresources`, `orders` and `research` apps on SQLite.
+"""
+import os
+import tempfile
+
+
+BENCHMARKS_DIR = os.environ.get('PERMISSIONS_BENCHMARKS_DIR') or \
+    tempfile.mkdtemp(prefix='permissions-benchmarks-')
+
+SECRET_KEY = 'permissions-benchmarks'
+
+DEBUG = False
+
+USE_TZ = True
+
+INSTALLED_APPS = [
+    'django.contrib.contenttypes',
+    'django.contrib.auth',
+    'people',
+    'humanresources',
+    'orders',
+    'research',
+    # the app config, as Django 3.2+ would otherwise look for it in the
+    # permissions.apps package, which imports pyforms
+    'permissions.config.PermissionsConfig',
+]
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BENCHMARKS_DIR, 'db.sqlite3'),
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# The stub apps have no migrations, and the migrations of the permissions
+# app depend on the ones of the real people app, so all the tables are
+# created from the models.
+MIGRATION_MODULES = {
+    'people': None,
+    'humanresources': None,
+    'orders': None,
+    'research': None,
+    'permissions': None,
+}
+
+ROOT_URLCONF = 'permissions.urls'
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BENCHMARKS_DIR, 'media')
+
+PROFILE_HUMAN_RESOURCES = 'PROFILE: Human Resources'
+APP_PROFILE_ALL_ORDERS = 'PROFILE: All Orders'
@@ -0,0 +1,51 @@
+from django.db import models
+
+from people.models import ListPermissionsQuerySet
+
+
+class ContractQuerySet(ListPermissionsQuerySet):
+    OWNER_LOOKUP = 'person__auth_user'
+    RESEARCH_GROUP_LOOKUP = 'person__groups'
+
+
+class Contract(models.Model):
+    ref = models.CharField(max_length=20)
+    position = models.CharField(max_length=100, blank=True)
+    start = models.DateField()
+    end = models.DateField(null=True, blank=True)
+    person = models.ForeignKey('people.Person', related_name='contracts', on_delete=models.CASCADE)
+    supervisor = models.ForeignKey('people.Person', related_name='supervised_contracts', null=True, blank=True, on_delete=models.SET_NULL)
+
+    objects = ContractQuerySet.as_manager()
+
+    class Meta:
+        verbose_name_plural = 'Contracts'
+
+    def __str__(self):
+        return self.ref
+
+
+class ContractProposal(models.Model):
+    position = models.CharField(max_length=100, blank=True)
+    start = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    person = models.ForeignKey('people.Person', related_name='proposals', on_delete=models.CASCADE)
+    supervisor = models.ForeignKey('people.Person', related_name='supervised_proposals', null=True, blank=True, on_delete=models.SET_NULL)
+
+    objects = ContractQuerySet.as_manager()
+
+    class Meta:
+        verbose_name_plural = 'Contract proposals'
+
+    def __str__(self):
+        return f'{self.person} - {self.position}'
+
+
+class ContractFile(models.Model):
+    contract = models.ForeignKey(Contract, related_name='files', on_delete=models.CASCADE)
+    contractfile_file = models.FileField(upload_to='uploads/contractfile/contractfile_file')
+
+
+class PrivateInfo(models.Model):
+    person = models.OneToOneField('people.Person', related_name='privateinfo', on_delete=models.CASCADE)
+    privateinfo_cv = models.FileField(upload_to='uploads/privateinfo/privateinfo_cv', blank=True)
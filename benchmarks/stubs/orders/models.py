@@ -0,0 +1,32 @@
+from django.db import models
+
+from people.models import ListPermissionsQuerySet
+
+
+class OrderQuerySet(ListPermissionsQuerySet):
+    OWNER_LOOKUP = 'responsible'
+    RESEARCH_GROUP_LOOKUP = 'group'
+
+
+class Order(models.Model):
+    order_desc = models.CharField(max_length=255)
+    order_amount = models.DecimalField(max_digits=11, decimal_places=2, default=0)
+    responsible = models.ForeignKey('auth.User', related_name='+', null=True, blank=True, on_delete=models.SET_NULL)
+    group = models.ForeignKey('people.Group', related_name='+', null=True, blank=True, on_delete=models.SET_NULL)
+
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        verbose_name_plural = 'Orders'
+        permissions = (
+            ('app_access_orders', 'Access orders app'),
+        )
+
+    def __str__(self):
+        return self.order_desc
+
+
+class OrderFile(models.Model):
+    order = models.ForeignKey(Order, related_name='files', on_delete=models.CASCADE)
+    file = models.FileField(upload_to='uploads/orderfile/file')
+    createdby = models.ForeignKey('auth.User', related_name='+', null=True, blank=True, on_delete=models.SET_NULL)
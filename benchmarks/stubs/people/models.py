@@ -0,0 +1,67 @@
+from django.db import models
+from django.db.models import Q
+
+
+class ListPermissionsQuerySet(models.QuerySet):
+    """Approximation of the `list_permissions` of the CORE apps: the objects
+    owned by the user plus the objects of the research groups in which the
+    user ranks with the view permission of the model.
+    """
+
+    OWNER_LOOKUP = None
+    RESEARCH_GROUP_LOOKUP = None
+
+    def list_permissions(self, user):
+        from permissions.models import Permission as RankedPermission
+
+        if user.is_superuser:
+            return self
+
+        ranked = RankedPermission.objects.filter_by_auth_permissions(user, self.model, ['view'])
+        if ranked.filter(researchgroup=None).exists():
+            return self
+
+        condition = Q(**{self.OWNER_LOOKUP: user})
+        if self.RESEARCH_GROUP_LOOKUP:
+            condition |= Q(**{f'{self.RESEARCH_GROUP_LOOKUP}__in': ranked.values('researchgroup')})
+        return self.filter(condition).distinct()
+
+
+class PersonQuerySet(ListPermissionsQuerySet):
+    OWNER_LOOKUP = 'auth_user'
+    RESEARCH_GROUP_LOOKUP = 'groups'
+
+
+class GroupType(models.Model):
+    grouptype_name = models.CharField(max_length=100)
+
+    def __str__(self):
+        return self.grouptype_name
+
+
+class Person(models.Model):
+    full_name = models.CharField(max_length=100)
+    auth_user = models.ForeignKey('auth.User', related_name='person_user', null=True, blank=True, on_delete=models.SET_NULL)
+    person_cv = models.FileField(upload_to='uploads/person/person_cv', blank=True)
+
+    objects = PersonQuerySet.as_manager()
+
+    class Meta:
+        verbose_name_plural = 'People'
+        permissions = (
+            ('app_access_people', 'Access people app'),
+        )
+
+    def __str__(self):
+        return self.full_name
+
+
+class Group(models.Model):
+    group_id = models.AutoField(primary_key=True)
+    group_name = models.CharField(max_length=100)
+    grouptype = models.ForeignKey(GroupType, null=True, blank=True, on_delete=models.SET_NULL)
+    person = models.ForeignKey(Person, related_name='+', null=True, blank=True, on_delete=models.SET_NULL)
+    members = models.ManyToManyField(Person, related_name='groups')
+
+    def __str__(self):
+        return self.group_name
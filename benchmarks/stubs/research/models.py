@@ -0,0 +1,12 @@
+from django.db import models
+
+
+class Publication(models.Model):
+    title = models.CharField(max_length=255)
+    group = models.ForeignKey('people.Group', related_name='+', null=True, blank=True, on_delete=models.SET_NULL)
+
+    class Meta:
+        verbose_name_plural = 'Publications'
+
+    def __str__(self):
+        return self.title
@@ -1,2 +1,4 @@
 __version__ = "0.3"
-__license__ = 'MIT'
\ No newline at end of file
+__license__ = 'MIT'
+
+default_app_config = 'permissions.config.PermissionsConfig'
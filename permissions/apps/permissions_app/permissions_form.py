@@ -1,13 +1,12 @@
-from django.apps import apps
-from django.contrib.auth.models import Group as AuthGroup, User, Permission
-from django.contrib.contenttypes.models import ContentType
+from django.contrib.auth.models import Group as AuthGroup, User
+from django.db import transaction
 
 from confapp import conf
 from pyforms.basewidget import BaseWidget
 from pyforms.basewidget import no_columns
 from pyforms.basewidget import segment
 from pyforms.controls import ControlButton
-from pyforms.controls import ControlList
+from pyforms.controls import ControlQueryList
 from pyforms.controls import ControlText
 from pyforms.controls import ControlCheckBox
 from pyforms.controls import ControlAutoComplete
@@ -15,41 +14,46 @@ from pyforms_web.widgets.django import ModelFormWidget
 
 from people.models import Group as ResearchGroup
 
-
-def chunks(l, n):
-    n = max(1, n)
-    return [
-        tuple(l[i:i+n] + [' '] * (n-len(l[i:i+n])))
-        for i in range(0, len(l), n)
-    ]
+from permissions.group_changes import apply_group_changes
+from permissions.instrumentation import instrumented
+from permissions.registry import get_managed_permissions
+from permissions.search import AUTH_GROUPS_INDEX
+from permissions.search import USERS_INDEX
+from permissions.search import search_queryset
 
 
 class GroupMembersWidget(BaseWidget):
 
     LAYOUT_POSITION = conf.LAYOUT_NEW_WINDOW
 
+    ROWS_PER_PAGE = 20
+
     def __init__(self, *args, **kwargs):
         self.group = kwargs.pop('group')
         super().__init__(self, *args, **kwargs)
 
         if isinstance(self.group, AuthGroup):
-            users = self.group.user_set.all()
-            users = users.values_list('username', flat=True)
+            users = User.objects.filter(groups=self.group)
         elif isinstance(self.group, ResearchGroup):
-            people = self.group.members.all()
-            users = [person.auth_user.username for person in people]
+            # members without an auth user are not listed
+            users = User.objects.filter(
+                person_user__in=self.group.members.values('pk')
+            ).distinct()
         else:
             raise ValueError('Invalid group type')
 
-        users = [(u, ) for u in users]
-
-        self._list = ControlList(
-            horizontal_headers=['username'],
-            default=list(users),
+        # paged and filtered in the database, one query per page
+        self._list = ControlQueryList(
+            'Members',
+            list_display=['username'],
+            search_fields=['username__icontains'],
+            rows_per_page=self.ROWS_PER_PAGE,
         )
+        # ControlQueryList ignores the default, the queryset is assigned
+        self._list.value = users.only('pk', 'username').order_by('username')
 
         self.title = str(self.group)
-        self.formset = ['_list' if users else ' ']
+        self.formset = ['_list']
 
 
 class EditGroupWindow(BaseWidget):
@@ -154,7 +158,8 @@ class PermissionsFormWidget(ModelFormWidget):
         self.researchgroup.update_control_event = self.__group_selection_changed
 
         # Create the permissions controls
-        for perm in self.__permissions_to_manage():
+        self.__managed_permissions = list(self.__permissions_to_manage())
+        for perm in self.__managed_permissions:
             control = ControlCheckBox(perm.name, label_visible=False)
             setattr(self, perm.codename, control)
 
@@ -170,45 +175,22 @@ class PermissionsFormWidget(ModelFormWidget):
 
         Select the desired models using `MODELS_TO_MANAGE`.
         """
+        for managed in get_managed_permissions(self.MODELS_TO_MANAGE):
+            yield from managed.permissions
 
-        for model_name in self.MODELS_TO_MANAGE:
-            try:
-                model = apps.get_model(model_name)
-            except LookupError:
-                continue
-
-            content_type = ContentType.objects.get_for_model(model)
-
-            permissions = Permission.objects.filter(content_type=content_type)
-
-            # retrieve default permissions first
-            default_codenames = list(map(
-                lambda x: f'{x}_{content_type.model}',
-                ('view', 'add', 'change', 'delete'),
-            ))
-            for default_codename in default_codenames:
-                perm = permissions.get(codename=default_codename)
-                yield perm
-
-            # and finally any custom defined permissions
-            for custom_perm in permissions\
-                    .exclude(codename__in=default_codenames)\
-                    .order_by('name'):
-                    yield custom_perm
-
+    @instrumented('permissions_form.populate_permissions')
     def __populate_permissions(self):
         """
         Configure the permissions checkboxes for the selected django group
         """
         if self.auth_group.value:
-            grpid = self.auth_group.value
-            grp = AuthGroup.objects.get(pk=grpid)
-            for perm in Permission.objects.all():
-                if hasattr(self, perm.codename):
-                    if grp.permissions.filter(pk=perm.pk).exists():
-                        getattr(self, perm.codename).value = True
-                    else:
-                        getattr(self, perm.codename).value = False
+            granted = set(
+                AuthGroup.permissions.through.objects
+                .filter(group_id=self.auth_group.value)
+                .values_list('permission_id', flat=True)
+            )
+            for perm in self.__managed_permissions:
+                getattr(self, perm.codename).value = perm.pk in granted
 
     def get_fieldsets(self, default):
         """
@@ -216,34 +198,27 @@ class PermissionsFormWidget(ModelFormWidget):
         """
         default = default + ['-']
 
-        last = None
-        fields = []
-        for perm in self.__permissions_to_manage():
-            if last != perm.content_type:
-                if fields:
-                    default = default + ['h3:'+last.model_class()._meta.verbose_name_plural, segment(chunks(fields, 4))]
-                last = perm.content_type
-                fields = []
-
-            fields = fields + [perm.codename]
+        for managed in get_managed_permissions(self.MODELS_TO_MANAGE):
+            if not managed.permissions:
+                continue
+            default = default + [
+                'h3:'+managed.model._meta.verbose_name_plural,
+                segment(list(managed.fieldset)),
+            ]
 
-        default = default + ['h3:'+last.model_class()._meta.verbose_name_plural, segment(chunks(fields, 4))]
         return default
 
     def save_object(self, obj, **kwargs):
-        obj = super().save_object(obj, **kwargs)
-
-        # Save the group users
-        users = User.objects.filter(pk__in=self._members.value)
-        obj.auth_group.user_set.set(users)
+        with transaction.atomic():
+            obj = super().save_object(obj, **kwargs)
 
-        # Save the permissions to the group
-        permissions = []
-        for perm in self.__permissions_to_manage():
-            field = getattr(self, perm.codename)
-            if field.value:
-                permissions.append(perm)
-        obj.auth_group.permissions.set(permissions)
+            # Save the group users and permissions, writing only the changes
+            users = [int(pk) for pk in self._members.value or []]
+            permissions = [
+                perm.pk for perm in self.__managed_permissions
+                if getattr(self, perm.codename).value
+            ]
+            self.group_changes = apply_group_changes(obj.auth_group, users, permissions)
 
         return obj
 
@@ -257,10 +232,10 @@ class PermissionsFormWidget(ModelFormWidget):
             # TODO update value in combobox
 
     def __members_queryset_filter(self, qs, keyword, control):
-        if keyword:
-            qs = qs.filter(username__icontains=keyword)
-
-        return qs
+        return search_queryset(
+            qs, USERS_INDEX, keyword,
+            fallback=lambda qs, keyword: qs.filter(username__icontains=keyword),
+        )
 
     def __permissions_queryset_filter(self, qs, keyword, control):
         qs = qs.filter()
@@ -270,6 +245,7 @@ class PermissionsFormWidget(ModelFormWidget):
 
         return qs
 
+    @instrumented('permissions_form.populate_members')
     def __populate_members(self):
         if self.auth_group.value:
             grp = AuthGroup.objects.get(pk=self.auth_group.value)
@@ -291,7 +267,10 @@ class PermissionsFormWidget(ModelFormWidget):
         qs = super().autocomplete_search(queryset, keyword, control)
 
         if control.name == 'auth_group' and keyword is not None:
-            return qs.filter(name__icontains=keyword)
+            return search_queryset(
+                qs, AUTH_GROUPS_INDEX, keyword,
+                fallback=lambda qs, keyword: qs.filter(name__icontains=keyword),
+            )
         else:
             return qs
 
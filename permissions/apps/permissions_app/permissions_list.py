@@ -1,10 +1,25 @@
 from confapp import conf
+from pyforms.controls import ControlQueryList
 from pyforms_web.widgets.django import ModelAdminWidget
 
 from permissions.models import Permission
 
 from .permissions_form import PermissionsFormWidget
 
+
+class PermissionsQueryList(ControlQueryList):
+    """Loads the permissions summary once for each page of the list.
+
+    The control keeps only the query of its queryset and rebuilds it from
+    `objects.all()`, dropping the iterable class, so the summary is added
+    to the page being rendered.
+    """
+
+    def queryset_to_list(self, queryset, list_display, first_row, last_row):
+        queryset = queryset.with_permissions_summary()
+        return super().queryset_to_list(queryset, list_display, first_row, last_row)
+
+
 class PermissionsListWidget(ModelAdminWidget):
     """
     """
@@ -25,6 +40,7 @@ class PermissionsListWidget(ModelAdminWidget):
 
 
     EDITFORM_CLASS = PermissionsFormWidget
+    CONTROL_LIST = PermissionsQueryList
 
     USE_DETAILS_TO_EDIT = False
 
@@ -55,3 +71,8 @@ class PermissionsListWidget(ModelAdminWidget):
 
         self._list.css = 'small'
         self._list.columns_size = ['3%', '10%', '10%', '15.4%', '15.4%', '15.4%', '15.4%']
+
+    def get_queryset(self, request, qs):
+        # the permissions columns are loaded by PermissionsQueryList
+        qs = super().get_queryset(request, qs)
+        return qs.select_related('auth_group', 'researchgroup')
@@ -1,6 +1,7 @@
-from pyforms.controls import ControlQueryList, ControlAutoComplete
-from pyforms.basewidget import BaseWidget
+from pyforms.controls import ControlQueryList, ControlAutoComplete, ControlButton
+from pyforms.basewidget import BaseWidget, no_columns
 from django.contrib.auth.models import User
+from django.core.exceptions import FieldDoesNotExist
 from people.models import Person
 
 from humanresources.models import Contract, ContractProposal
@@ -8,6 +9,45 @@ from orders.models import Order
 
 from confapp import conf
 
+from permissions.search import USERS_INDEX
+from permissions.search import search_queryset
+
+
+def related_lookups(model, list_display):
+    """Split the columns of `list_display` that are relations of the model
+    into the lookups for select_related and prefetch_related.
+    """
+    select, prefetch = [], []
+    for name in list_display:
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.many_to_one or field.one_to_one:
+            select.append(name)
+        elif field.many_to_many or field.one_to_many:
+            prefetch.append(name)
+    return select, prefetch
+
+
+class RelatedQueryList(ControlQueryList):
+    """ControlQueryList prefetching the many-valued columns of each page.
+
+    The control keeps only the query of its value and rebuilds the queryset
+    from it, dropping the prefetch lookups, so they are applied to the page
+    being rendered.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.prefetch = kwargs.pop('prefetch', [])
+        super().__init__(*args, **kwargs)
+
+    def queryset_to_list(self, queryset, list_display, first_row, last_row):
+        if self.prefetch:
+            queryset = queryset.prefetch_related(*self.prefetch)
+        return super().queryset_to_list(queryset, list_display, first_row, last_row)
+
+
 class UsersAccesses(BaseWidget):
 
     UID = 'users-accesses'
@@ -22,60 +62,110 @@ class UsersAccesses(BaseWidget):
 
     LAYOUT_POSITION = conf.ORQUESTRA_HOME_FULL
 
+    ROWS_PER_PAGE = 20
+
+    # tab name, model, list label and columns
+    TABS = (
+        ('contracts', Contract, 'Contracts',
+            ['person', 'ref', 'position', 'start', 'end', 'is_active']),
+        ('proposals', ContractProposal, 'Proposals',
+            ['personname', 'position', 'start', 'end_date', 'supervisor', 'status_icon']),
+        ('people', Person, 'People',
+            ['thumbnail_80x80', 'full_name', 'person_email', 'person_active']),
+        ('orders', Order, 'Orders',
+            ['order_desc', 'order_req', 'finance', 'order_amount', 'order_reqnum', 'order_reqdate', 'order_ponum', 'expense_codes']),
+    )
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self._user = ControlAutoComplete('User', 
-            queryset=User.objects.all(), 
-            changed_event=self.__populate_lists,
+        self._user = ControlAutoComplete('User',
+            queryset=User.objects.all(),
+            changed_event=self.__user_changed,
             queryset_filter=self.__members_queryset_filter
         )
 
-        self._contracts = ControlQueryList('Contracts', 
-            default=Contract.objects.filter(pk=None),
-            list_display=['person', 'ref', 'position', 'start', 'end', 'is_active'] )
-        self._proposals = ControlQueryList('Proposals', 
-            default=ContractProposal.objects.filter(pk=None),
-            list_display=['personname', 'position', 'start', 'end_date', 'supervisor', 'status_icon'])
-        self._people    = ControlQueryList('People',    
-            default=Person.objects.filter(pk=None),
-            list_display=['thumbnail_80x80', 'full_name', 'person_email', 'person_active'])
-        self._orders    = ControlQueryList('Orders',    
-            default=Order.objects.filter(pk=None),
-            list_display=['order_desc', 'order_req', 'finance', 'order_amount', 'order_reqnum', 'order_reqdate', 'order_ponum', 'expense_codes'])
-
+        self._selected_tab = self.TABS[0][0]
+
+        # Tabs are rendered in the browser only, so each one is replaced by
+        # a button that loads its list when pressed.
+        for name, model, label, list_display in self.TABS:
+            button = ControlButton(
+                label,
+                default=self.__tab_event(name),
+                label_visible=False,
+                css='basic',
+            )
+            setattr(self, f'_{name}_btn', button)
+
+            querylist = RelatedQueryList(label,
+                list_display=list_display,
+                prefetch=related_lookups(model, list_display)[1],
+                rows_per_page=self.ROWS_PER_PAGE)
+            setattr(self, f'_{name}', querylist)
 
         self.formset = [
             '_user',
-            {
-                'a:Contracts':['_contracts'],
-                'b:Proposals':['_proposals'],
-                'c:People':   ['_people'],
-                'd:Orders':   ['_orders'],
-            }
-        ]
+            no_columns(*[f'_{name}_btn' for name, *_ in self.TABS]),
+        ] + [f'_{name}' for name, *_ in self.TABS]
 
+        self.__show_tab()
 
-    def __members_queryset_filter(self, qs, keyword, control):
-        if keyword:
-            return qs.filter(username__icontains=keyword)
-        else:
-            return qs
 
+    def __members_queryset_filter(self, qs, keyword, control):
+        return search_queryset(
+            qs, USERS_INDEX, keyword,
+            fallback=lambda qs, keyword: qs.filter(username__icontains=keyword),
+        )
 
-    def __populate_lists(self):
+    def __selected_user(self):
         try:
-            user = User.objects.get(pk=self._user.value)
-
-            self._contracts.value = Contract.objects.list_permissions(user)
-            self._orders.value    = Order.objects.list_permissions(user)
-            self._proposals.value = ContractProposal.objects.list_permissions(user)
-            self._people.value    = Person.objects.list_permissions(user)
-
+            return User.objects.get(pk=self._user.value)
         except User.DoesNotExist:
-            self._contracts.value = None
-            self._orders.value    = None
-            self._proposals.value = None
-            self._people.value    = None
-
-        
\ No newline at end of file
+            return None
+
+    def __tab_event(self, name):
+        def event():
+            self._selected_tab = name
+            self.__show_tab()
+        return event
+
+    def __user_changed(self):
+        """Show the number of accessible objects on each tab and load the selected one."""
+        user = self.__selected_user()
+
+        for name, model, label, list_display in self.TABS:
+            button = getattr(self, f'_{name}_btn')
+            if user is None:
+                button.label = label
+            else:
+                count = model.objects.list_permissions(user).count()
+                button.label = f'{label} ({count})'
+
+        self.__show_tab(user)
+
+    def __show_tab(self, user=None):
+        """Assign the queryset of the selected tab only and hide the others."""
+        if user is None and self._user.value:
+            user = self.__selected_user()
+
+        for name, model, label, list_display in self.TABS:
+            querylist = getattr(self, f'_{name}')
+            button = getattr(self, f'_{name}_btn')
+
+            if name != self._selected_tab:
+                querylist.hide()
+                button.css = 'basic'
+                continue
+
+            if user is None:
+                querylist.value = model.objects.none()
+            else:
+                select, _ = related_lookups(model, list_display)
+                queryset = model.objects.list_permissions(user)
+                if select:
+                    queryset = queryset.select_related(*select)
+                querylist.value = queryset
+
+            querylist.show()
+            button.css = 'blue'
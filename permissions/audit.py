@@ -0,0 +1,102 @@
+
+from django.contrib.auth.models import User
+
+from humanresources.models import Contract, ContractProposal
+from people.models import Person
+
+from .pool import process_pool
+
+
+AUDIT_CHUNK_SIZE = 200
+
+# Above this number of objects only the count is listed
+AUDIT_LIST_LIMIT = 300
+
+
+def _line(*values):
+    # same output as print(*values)
+    return ' '.join(map(str, values))
+
+
+def _listing(title, queryset, count):
+    if count <= AUDIT_LIST_LIMIT:
+        return _line(f'\t{title}: ', '\n\t\t'+'\n\t\t'.join(str(o) for o in queryset.iterator()))
+    else:
+        return _line(f'\t{title}:', '\033[91m', count, '\033[0m')
+
+
+def audit_user(user, person):
+    """Return the report of the user, or None if the user only has access
+    to its own contracts, proposals and person.
+    """
+    contracts = Contract.objects.list_permissions(user).order_by('person__full_name')
+    proposals = ContractProposal.objects.list_permissions(user).order_by('person__full_name')
+    people    = Person.objects.list_permissions(user).order_by('full_name')
+
+    if person is None:
+        report = (
+            contracts.exclude(person=None).exists() or
+            proposals.exists() or
+            people.exists()
+        )
+    else:
+        report = (
+            contracts.exclude(person=person).exists() or
+            proposals.exclude(person=person).exists() or
+            people.exclude(pk=person.pk).exists()
+        )
+
+    if not report:
+        return None
+
+    n_contracts = contracts.count()
+    n_proposals = proposals.count()
+    n_people    = people.count()
+
+    return '\n'.join([
+        _line(
+            '\033[92m', str(user), '\033[0m',
+            'Contracts:', '\033[91m', n_contracts, '\033[0m'
+            'Proposals:', '\033[91m', n_proposals, '\033[0m'
+            'People:',    '\033[91m', n_people,    '\033[0m'),
+        _listing('CONTRACTS', contracts, n_contracts),
+        _listing('PROPOSALS', proposals, n_proposals),
+        _listing('PEOPLE', people, n_people),
+    ])
+
+
+def audit_chunk(user_ids):
+    """Audit a chunk of users, loading the users and their persons
+    in two queries. Returns the reports in the order of `user_ids`.
+    """
+    users = User.objects.in_bulk(user_ids)
+
+    persons = {}
+    for person in Person.objects.filter(auth_user__in=user_ids).order_by('-pk'):
+        persons[person.auth_user_id] = person
+
+    reports = []
+    for user_id in user_ids:
+        report = audit_user(users[user_id], persons.get(user_id))
+        if report is not None:
+            reports.append(report)
+    return reports
+
+
+def audit_users(queryset=None, chunk_size=AUDIT_CHUNK_SIZE, workers=1):
+    """Generate the reports of the users, auditing them in chunks.
+    With more than one worker the chunks are spread over a process pool.
+    """
+    if queryset is None:
+        queryset = User.objects.all()
+
+    user_ids = list(queryset.order_by('username').values_list('pk', flat=True))
+    chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+
+    if workers > 1:
+        with process_pool(workers) as executor:
+            for reports in executor.map(audit_chunk, chunks):
+                yield from reports
+    else:
+        for chunk in chunks:
+            yield from audit_chunk(chunk)
@@ -0,0 +1,105 @@
+import os
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Exists
+from django.db.models import Q
+from django.utils._os import safe_join
+from django.utils.module_loading import import_string
+
+from .documents import is_user_document
+from .instrumentation import instrumented
+from .rules import installed_file_fields
+
+
+def _profile_exists(user, name):
+    """Subquery checking if the user belongs to the auth group `name`."""
+    return Exists(User.groups.through.objects.filter(
+        user_id=user.pk,
+        group__name=name,
+    ))
+
+
+def _owned_or_profile(queryset, owner, user, profile):
+    """Return True if a row of `queryset` is owned by the user or
+    the user belongs to the given profile, in one query.
+    """
+    queryset = queryset.annotate(_profile=_profile_exists(user, profile))
+    return queryset.filter(owner | Q(_profile=True)).exists()
+
+
+@instrumented('media_resolver.contract_file')
+def contract_file(user, path):
+    from humanresources.models import ContractFile
+
+    queryset = ContractFile.objects.filter(contractfile_file=path)
+    owner = Q(contract__person__auth_user=user) | Q(contract__supervisor__auth_user=user)
+    return _owned_or_profile(queryset, owner, user, settings.PROFILE_HUMAN_RESOURCES)
+
+
+@instrumented('media_resolver.privateinfo_cv')
+def privateinfo_cv(user, path):
+    from humanresources.models import PrivateInfo
+
+    queryset = PrivateInfo.objects.filter(privateinfo_cv=path)
+    owner = Q(person__auth_user=user)
+    return _owned_or_profile(queryset, owner, user, settings.PROFILE_HUMAN_RESOURCES)
+
+
+@instrumented('media_resolver.person_cv')
+def person_cv(user, path):
+    from people.models import Person
+
+    queryset = Person.objects.filter(person_cv=path)
+    owner = Q(auth_user=user)
+    return _owned_or_profile(queryset, owner, user, settings.PROFILE_HUMAN_RESOURCES)
+
+
+@instrumented('media_resolver.order_file')
+def order_file(user, path):
+    from orders.models import OrderFile
+
+    queryset = OrderFile.objects.filter(file=path).annotate(
+        _hr=_profile_exists(user, settings.PROFILE_HUMAN_RESOURCES),
+    )
+    owner = Q(createdby=user) | Q(_hr=True)
+    return _owned_or_profile(queryset, owner, user, settings.APP_PROFILE_ALL_ORDERS)
+
+
+@instrumented('media_resolver.any_document')
+def any_document(user, path):
+    """Resolver of the paths outside the protected roots: human resources,
+    and the owners of the file in any of the protected models, may access it.
+    """
+    profile = User.groups.through.objects.filter(
+        user_id=user.pk,
+        group__name=settings.PROFILE_HUMAN_RESOURCES,
+    )
+    if profile.exists():
+        return True
+
+    return any(
+        import_string(resolver)(user, path)
+        for _, _, resolver in installed_file_fields()
+    )
+
+
+@instrumented('media_authorize')
+def authorize(user, path, document_root, resolver):
+    """Check if the user may access the media file `path`.
+
+    The `resolver` of the path rule queries only the row owning the
+    requested file, so the cost does not depend on the number of documents
+    the user can access. Files that do not exist are denied before any
+    query, like the files of other users, so their names cannot be probed.
+    """
+    try:
+        full_path = safe_join(document_root or settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        return False
+
+    if not os.path.isfile(full_path):
+        return False
+
+    return is_user_document(user, path, resolver)
@@ -0,0 +1,143 @@
+import threading
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Permission as AuthPermission
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+
+from .instrumentation import record_cache
+
+
+AUTH_VERSION_KEY = 'permissions:auth:version:{}'
+AUTH_CATALOGUE_VERSION_KEY = 'permissions:auth:catalogue'
+AUTH_KEY = 'permissions:auth:{user}:{version}:{catalogue}'
+
+# Attribute keeping the cached entry on the user instance for the request
+AUTH_ATTR = '_permissions_auth'
+
+BACKEND_PATH = 'permissions.backends.CachedModelBackend'
+
+# Auth groups changed in the current transaction of each thread
+_pending = threading.local()
+
+
+def auth_cache_enabled():
+    """The entries are kept, and the signals invalidating them connected,
+    only when `CachedModelBackend` is in the AUTHENTICATION_BACKENDS setting.
+    """
+    return BACKEND_PATH in settings.AUTHENTICATION_BACKENDS
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def _bump_user_auth(user_ids):
+    cache.set_many({AUTH_VERSION_KEY.format(pk): _new_version() for pk in user_ids}, None)
+
+
+def invalidate_user_auth(user_ids):
+    """Bump the auth version of the users, in every process, when the
+    transaction is committed. A bump before the commit would let another
+    request cache the previous groups under the new version.
+    """
+    user_ids = set(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: _bump_user_auth(user_ids))
+
+
+def _flush_auth_groups():
+    auth_group_ids = _pending.__dict__.pop('auth_group_ids', None)
+    if auth_group_ids:
+        invalidate_user_auth(
+            User.groups.through.objects
+            .filter(group_id__in=auth_group_ids)
+            .values_list('user_id', flat=True)
+        )
+
+
+def invalidate_auth_groups(auth_group_ids):
+    """Bump the auth version of the members of the auth groups when the
+    transaction is committed. All the groups changed in a transaction are
+    resolved to their members in one query. The groups of a rolled back
+    transaction are invalidated with the next commit.
+    """
+    _pending.__dict__.setdefault('auth_group_ids', set()).update(auth_group_ids)
+    transaction.on_commit(_flush_auth_groups)
+
+
+def invalidate_auth_catalogue():
+    """Bump the version of all users, after a permission was renamed or deleted."""
+    cache.set(AUTH_CATALOGUE_VERSION_KEY, _new_version(), None)
+
+
+def _perms(queryset):
+    return frozenset(
+        f'{app_label}.{codename}'
+        for app_label, codename in queryset.values_list('content_type__app_label', 'codename')
+    )
+
+
+def _load_user_auth(user):
+    return {
+        'user': _perms(AuthPermission.objects.filter(user=user)),
+        'group': _perms(AuthPermission.objects.filter(group__user=user)),
+    }
+
+
+def get_user_auth(user):
+    """Return the user and group permissions of the user,
+    as {'user': perms, 'group': perms}.
+
+    The entry is kept in the cache framework under the user version, bumped
+    by the signals registered in `permissions.signals`, and on the user
+    instance for the rest of the request.
+    """
+    entry = user.__dict__.get(AUTH_ATTR)
+    if entry is not None:
+        return entry
+
+    version_key = AUTH_VERSION_KEY.format(user.pk)
+    versions = cache.get_many([version_key, AUTH_CATALOGUE_VERSION_KEY])
+    for key in (version_key, AUTH_CATALOGUE_VERSION_KEY):
+        if key not in versions:
+            versions[key] = _new_version()
+            if not cache.add(key, versions[key], None):
+                versions[key] = cache.get(key, versions[key])
+
+    key = AUTH_KEY.format(
+        user=user.pk,
+        version=versions[version_key],
+        catalogue=versions[AUTH_CATALOGUE_VERSION_KEY],
+    )
+    entry = cache.get(key)
+    record_cache('auth', hits=entry is not None, misses=entry is None)
+    if entry is None:
+        entry = _load_user_auth(user)
+        timeout = getattr(settings, 'PERMISSIONS_AUTH_CACHE_TIMEOUT', 3600)
+        cache.set(key, entry, timeout)
+
+    user.__dict__[AUTH_ATTR] = entry
+    return entry
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend reading the user and group permissions from `get_user_auth`,
+    so repeated checks, across requests and processes, skip the database.
+
+        AUTHENTICATION_BACKENDS = ['permissions.backends.CachedModelBackend']
+    """
+
+    def _get_permissions(self, user_obj, obj, from_name):
+        # superusers have every permission, the catalogue is not cached
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None or user_obj.is_superuser:
+            return super()._get_permissions(user_obj, obj, from_name)
+
+        perm_cache_name = f'_{from_name}_perm_cache'
+        if not hasattr(user_obj, perm_cache_name):
+            setattr(user_obj, perm_cache_name, set(get_user_auth(user_obj)[from_name]))
+        return getattr(user_obj, perm_cache_name)
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class PermissionsConfig(AppConfig):
+    name = 'permissions'
+
+    def ready(self):
+        from . import signals
+        from .rules import get_media_rules
+
+        signals.connect()
+        # compile the media path rules once at startup
+        get_media_rules()
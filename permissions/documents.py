@@ -0,0 +1,62 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .instrumentation import record_cache
+
+
+DOCUMENTS_VERSION_KEY = 'permissions:documents:version:{}'
+DOCUMENTS_KEY = 'permissions:documents:{user}:{version}'
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def _documents_key(user):
+    version_key = DOCUMENTS_VERSION_KEY.format(user.pk)
+    version = cache.get(version_key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(version_key, version, None):
+            version = cache.get(version_key, version)
+    return DOCUMENTS_KEY.format(user=user.pk, version=version)
+
+
+def is_user_document(user, path, resolver):
+    """Check if the user may access the document `path`.
+
+    The documents granted by `resolver(user, path)` are added to a per-user
+    index kept in the cache framework, so repeated downloads are one cache
+    hit. The index is versioned and the version bumped by the signals
+    registered in `permissions.signals`. Denials are not kept.
+    """
+    key = _documents_key(user)
+
+    documents = cache.get(key, frozenset())
+    record_cache('documents', hits=path in documents, misses=path not in documents)
+    if path in documents:
+        return True
+
+    if not resolver(user, path):
+        return False
+
+    timeout = getattr(settings, 'PERMISSIONS_DOCUMENTS_CACHE_TIMEOUT', 3600)
+    cache.set(key, documents | {path}, timeout)
+    return True
+
+
+def _bump_user_documents(user_ids):
+    cache.set_many({DOCUMENTS_VERSION_KEY.format(pk): _new_version() for pk in user_ids}, None)
+
+
+def invalidate_user_documents(user_ids):
+    """Bump the documents index version of the given users, in every process,
+    when the transaction is committed. A bump before the commit would let
+    another request index a revoked document under the new version.
+    """
+    user_ids = {pk for pk in user_ids if pk is not None}
+    if user_ids:
+        transaction.on_commit(lambda: _bump_user_documents(user_ids))
@@ -0,0 +1,58 @@
+from collections import namedtuple
+
+from django.contrib.auth.models import Group as AuthGroup
+from django.contrib.auth.models import User
+from django.db import transaction
+
+
+GroupChanges = namedtuple('GroupChanges', [
+    'users_added',
+    'users_removed',
+    'permissions_added',
+    'permissions_removed',
+])
+
+
+def _diff(current, wanted):
+    return set(wanted) - current, current - set(wanted)
+
+
+def apply_group_changes(auth_group, user_ids, permission_ids):
+    """Make the auth group members and permissions equal to the given ids.
+
+    Only the difference to the current state is written, with one bulk
+    insert and one delete for each through table, inside a transaction.
+    The m2m_changed signals are sent as with `add` and `remove`.
+
+    Returns a `GroupChanges` with the ids added and removed.
+    """
+    with transaction.atomic():
+        current_users = set(
+            User.groups.through.objects
+            .filter(group_id=auth_group.pk)
+            .values_list('user_id', flat=True)
+        )
+        current_permissions = set(
+            AuthGroup.permissions.through.objects
+            .filter(group_id=auth_group.pk)
+            .values_list('permission_id', flat=True)
+        )
+
+        users_added, users_removed = _diff(current_users, user_ids)
+        permissions_added, permissions_removed = _diff(current_permissions, permission_ids)
+
+        if users_added:
+            auth_group.user_set.add(*users_added)
+        if users_removed:
+            auth_group.user_set.remove(*users_removed)
+        if permissions_added:
+            auth_group.permissions.add(*permissions_added)
+        if permissions_removed:
+            auth_group.permissions.remove(*permissions_removed)
+
+    return GroupChanges(
+        users_added=frozenset(users_added),
+        users_removed=frozenset(users_removed),
+        permissions_added=frozenset(permissions_added),
+        permissions_removed=frozenset(permissions_removed),
+    )
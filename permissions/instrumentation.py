@@ -0,0 +1,370 @@
+"""
+Instrumentation of the permissions hot paths.
+
+When the `PERMISSIONS_INSTRUMENTATION` setting is True, each instrumented
+operation records its wall time and number of queries, and the caches their
+hits and misses. The measurements are passed to the sinks listed in the
+`PERMISSIONS_INSTRUMENTATION_SINKS` setting:
+
+    MemorySink  histograms of the process, default
+    CacheSink   histograms of all the processes, aggregated in the cache
+    LogSink     a log line for each measurement
+
+The histograms are shown by the `permissions_stats` command and the
+`permissions_metrics` view, in the Prometheus text format. When disabled,
+an instrumented call only costs a check of a module flag.
+"""
+import atexit
+import functools
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils.module_loading import import_string
+
+
+DEFAULT_SINKS = ('permissions.instrumentation.MemorySink',)
+
+# Upper bounds of the histograms buckets, the last bucket is unbounded
+TIME_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+QUERIES_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+STATS_KEY = 'permissions:stats:{}'
+STATS_NAMES_KEY = STATS_KEY.format('names')
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+
+    def __init__(self, bounds, buckets=None, total=0):
+        self.bounds = bounds
+        self.buckets = list(buckets) if buckets else [0] * (len(bounds) + 1)
+        self.sum = total
+
+    @property
+    def count(self):
+        return sum(self.buckets)
+
+    def observe(self, value):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the quantile `q`, None if unbounded."""
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.bounds + (None,), self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return bound
+        return None
+
+
+def _snapshot(operations, caches):
+    return {
+        'operations': {
+            name: {
+                'time_ms': {'sum': time_ms.sum, 'buckets': list(time_ms.buckets)},
+                'queries': {'sum': queries.sum, 'buckets': list(queries.buckets)},
+            }
+            for name, (time_ms, queries) in operations.items()
+        },
+        'caches': {name: list(counts) for name, counts in caches.items()},
+    }
+
+
+class MemorySink:
+    """Aggregates the measurements of the process in histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations = {}
+        self._caches = {}
+
+    def record(self, name, duration_ms, queries):
+        with self._lock:
+            histograms = self._operations.get(name)
+            if histograms is None:
+                histograms = self._operations[name] = (
+                    Histogram(TIME_BUCKETS_MS), Histogram(QUERIES_BUCKETS))
+            histograms[0].observe(duration_ms)
+            histograms[1].observe(queries)
+
+    def record_cache(self, name, hits, misses):
+        with self._lock:
+            counts = self._caches.setdefault(name, [0, 0])
+            counts[0] += hits
+            counts[1] += misses
+
+    def snapshot(self):
+        with self._lock:
+            return _snapshot(self._operations, self._caches)
+
+    def reset(self):
+        with self._lock:
+            self._operations = {}
+            self._caches = {}
+
+
+class CacheSink(MemorySink):
+    """Adds the histograms of the process to counters in the cache every
+    `PERMISSIONS_INSTRUMENTATION_FLUSH_INTERVAL` seconds, so the statistics
+    of all the processes can be read by the `permissions_stats` command.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.interval = getattr(settings, 'PERMISSIONS_INSTRUMENTATION_FLUSH_INTERVAL', 10)
+        self._flushed_at = time.monotonic()
+        atexit.register(self.flush)
+
+    def record(self, name, duration_ms, queries):
+        super().record(name, duration_ms, queries)
+        self._maybe_flush()
+
+    def record_cache(self, name, hits, misses):
+        super().record_cache(name, hits, misses)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._flushed_at >= self.interval:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending = _snapshot(self._operations, self._caches)
+            self._operations = {}
+            self._caches = {}
+            self._flushed_at = time.monotonic()
+
+        names = _stats_names()
+        new_names = {
+            kind: sorted(set(names[kind]) | set(pending[kind]))
+            for kind in ('operations', 'caches')
+        }
+        if new_names != names:
+            cache.set(STATS_NAMES_KEY, new_names, None)
+
+        for key, value in _counters(pending).items():
+            if value:
+                cache.add(key, 0, None)
+                try:
+                    cache.incr(key, value)
+                except ValueError:
+                    # evicted between add and incr
+                    cache.set(key, value, None)
+
+    def snapshot(self):
+        snapshot = _empty_snapshot(_stats_names())
+        values = cache.get_many(list(_counters(snapshot)))
+        return _from_counters(snapshot, values)
+
+    def reset(self):
+        super().reset()
+        keys = list(_counters(_empty_snapshot(_stats_names())))
+        cache.delete_many(keys + [STATS_NAMES_KEY])
+
+
+def _stats_names():
+    """Names of the operations and caches with counters in the cache."""
+    return cache.get(STATS_NAMES_KEY) or {'operations': [], 'caches': []}
+
+
+def _empty_snapshot(names):
+    return {
+        'operations': {
+            name: {
+                'time_ms': {'sum': 0, 'buckets': [0] * (len(TIME_BUCKETS_MS) + 1)},
+                'queries': {'sum': 0, 'buckets': [0] * (len(QUERIES_BUCKETS) + 1)},
+            }
+            for name in names['operations']
+        },
+        'caches': {name: [0, 0] for name in names['caches']},
+    }
+
+
+def _counters(snapshot):
+    """Flatten a snapshot into integer counters by cache key,
+    with the times in microseconds.
+    """
+    counters = {}
+    for name, histograms in snapshot['operations'].items():
+        for field, scale in (('time_ms', 1000), ('queries', 1)):
+            histogram = histograms[field]
+            key = STATS_KEY.format(f'operation:{name}:{field}')
+            counters[f'{key}:sum'] = int(round(histogram['sum'] * scale))
+            for i, count in enumerate(histogram['buckets']):
+                counters[f'{key}:{i}'] = count
+    for name, (hits, misses) in snapshot['caches'].items():
+        counters[STATS_KEY.format(f'cache:{name}:hits')] = hits
+        counters[STATS_KEY.format(f'cache:{name}:misses')] = misses
+    return counters
+
+
+def _from_counters(snapshot, values):
+    for name, histograms in snapshot['operations'].items():
+        for field, scale in (('time_ms', 1000), ('queries', 1)):
+            histogram = histograms[field]
+            key = STATS_KEY.format(f'operation:{name}:{field}')
+            histogram['sum'] = values.get(f'{key}:sum', 0) / scale
+            histogram['buckets'] = [
+                values.get(f'{key}:{i}', 0) for i in range(len(histogram['buckets']))
+            ]
+    for name in snapshot['caches']:
+        snapshot['caches'][name] = [
+            values.get(STATS_KEY.format(f'cache:{name}:hits'), 0),
+            values.get(STATS_KEY.format(f'cache:{name}:misses'), 0),
+        ]
+    return snapshot
+
+
+class LogSink:
+    """Logs each measurement to the `permissions.instrumentation` logger."""
+
+    def record(self, name, duration_ms, queries):
+        logger.info('%s %.3fms %d queries', name, duration_ms, queries)
+
+    def record_cache(self, name, hits, misses):
+        logger.debug('%s cache %d hits %d misses', name, hits, misses)
+
+
+###############################################################################
+# Measurements
+###############################################################################
+
+_enabled = None
+_sinks = None
+
+
+def enabled():
+    global _enabled
+    if _enabled is None:
+        _enabled = getattr(settings, 'PERMISSIONS_INSTRUMENTATION', False)
+    return _enabled
+
+
+def get_sinks():
+    global _sinks
+    if _sinks is None:
+        paths = getattr(settings, 'PERMISSIONS_INSTRUMENTATION_SINKS', DEFAULT_SINKS)
+        _sinks = [import_string(path)() for path in paths]
+    return _sinks
+
+
+def reset_instrumentation(**kwargs):
+    """Read the instrumentation settings again, discarding the sinks."""
+    global _enabled, _sinks
+    if kwargs.get('setting', 'PERMISSIONS_INSTRUMENTATION').startswith('PERMISSIONS_INSTRUMENTATION'):
+        _enabled = None
+        _sinks = None
+
+
+def get_snapshot():
+    """Return the histograms of the first sink keeping them, or None."""
+    for sink in get_sinks():
+        if hasattr(sink, 'snapshot'):
+            return sink.snapshot()
+    return None
+
+
+class _QueriesCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def measure(name):
+    """Record the wall time and queries of the block as the operation `name`."""
+    if not enabled():
+        yield
+        return
+
+    counter = _QueriesCounter()
+    start = time.perf_counter()
+    try:
+        with connection.execute_wrapper(counter):
+            yield
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        for sink in get_sinks():
+            sink.record(name, duration_ms, counter.count)
+
+
+def instrumented(name):
+    """Decorator measuring each call of the function as the operation `name`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return func(*args, **kwargs)
+            with measure(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_cache(name, hits=0, misses=0):
+    """Count the hits and misses of the cache `name`."""
+    if enabled():
+        for sink in get_sinks():
+            sink.record_cache(name, hits, misses)
+
+
+###############################################################################
+# Text exposition
+###############################################################################
+
+def _labels(**labels):
+    return ','.join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def _histogram_lines(metric, histogram, bounds, scale, labels):
+    lines, cumulative = [], 0
+    for bound, count in zip(bounds + ('+Inf',), histogram['buckets']):
+        cumulative += count
+        le = bound if bound == '+Inf' else f'{bound * scale:g}'
+        lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {cumulative}')
+    lines.append(f'{metric}_sum{{{labels}}} {histogram["sum"] * scale:g}')
+    lines.append(f'{metric}_count{{{labels}}} {cumulative}')
+    return lines
+
+
+def render_text(snapshot):
+    """Render a snapshot in the Prometheus text exposition format."""
+    lines = [
+        '# HELP permissions_operation_seconds Wall time of the permissions operations.',
+        '# TYPE permissions_operation_seconds histogram',
+    ]
+    for name, histograms in sorted(snapshot['operations'].items()):
+        lines += _histogram_lines(
+            'permissions_operation_seconds', histograms['time_ms'],
+            TIME_BUCKETS_MS, 0.001, _labels(operation=name))
+
+    lines += [
+        '# HELP permissions_operation_queries Database queries of the permissions operations.',
+        '# TYPE permissions_operation_queries histogram',
+    ]
+    for name, histograms in sorted(snapshot['operations'].items()):
+        lines += _histogram_lines(
+            'permissions_operation_queries', histograms['queries'],
+            QUERIES_BUCKETS, 1, _labels(operation=name))
+
+    lines += [
+        '# HELP permissions_cache_requests_total Lookups of the permissions caches.',
+        '# TYPE permissions_cache_requests_total counter',
+    ]
+    for name, (hits, misses) in sorted(snapshot['caches'].items()):
+        lines.append(f'permissions_cache_requests_total{{{_labels(cache=name, result="hit")}}} {hits}')
+        lines.append(f'permissions_cache_requests_total{{{_labels(cache=name, result="miss")}}} {misses}')
+
+    return '\n'.join(lines) + '\n'
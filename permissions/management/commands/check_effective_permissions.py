@@ -0,0 +1,38 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from permissions.models import EffectivePermission
+
+
+class Command(BaseCommand):
+    help = 'Compare the effective permissions table with the ranked permissions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            dest='fix',
+            help='Update the rows of the users with differences',
+        )
+
+    def handle(self, *args, **options):
+        differences = list(EffectivePermission.objects.differences())
+
+        content_types = ContentType.objects.in_bulk({row[2] for row in differences})
+        for user_id, researchgroup_id, content_type_id, codename, expected, current in differences:
+            content_type = content_types.get(content_type_id)
+            label = f'{content_type.app_label}.{codename}' if content_type else codename
+            self.stdout.write(
+                f'user {user_id:5} research group {researchgroup_id}: '
+                f'{label} expected {expected}, found {current}')
+
+        users = {row[0] for row in differences}
+
+        if options['fix'] and users:
+            created, deleted = EffectivePermission.objects.sync_users(users)
+            self.stdout.write(f'{len(users)} users updated: {created} rows created, {deleted} deleted')
+        elif differences:
+            raise CommandError(f'{len(differences)} inconsistent rows for {len(users)} users')
+        else:
+            self.stdout.write(self.style.SUCCESS('The effective permissions are consistent'))
@@ -0,0 +1,93 @@
+import csv
+import json
+
+from django.contrib.auth.models import Group as AuthGroup
+from django.core.management.base import BaseCommand
+
+from permissions.models import Permission as RankedPermissions
+from permissions.profiles import PROFILE_RANKS
+from permissions.profiles import profile_codenames
+
+
+class Command(BaseCommand):
+    help = 'Report the ranked profiles whose permissions differ from the profile defaults'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=('json', 'csv'),
+            default='json',
+            dest='format',
+            help='Output format',
+        )
+
+        parser.add_argument(
+            '--only-drift',
+            action='store_true',
+            dest='only_drift',
+            help='Report only the profiles with missing or extra permissions',
+        )
+
+    def handle(self, *args, **options):
+        report = self.drift_report(only_drift=options['only_drift'])
+
+        if options['format'] == 'csv':
+            self._write_csv(report)
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+
+    def drift_report(self, only_drift=False):
+        """Compare every ranked profile with its template in two queries.
+        Permissions are identified as 'app_label.codename'.
+        """
+        profiles = {rank: profile for profile, rank in PROFILE_RANKS.items()}
+
+        templates = {
+            profile: {f'{app_label}.{codename}' for app_label, _, codename in profile_codenames(profile)}
+            for profile in profiles.values()
+        }
+
+        ranked = RankedPermissions.objects\
+            .filter(ranking__in=list(profiles))\
+            .order_by('auth_group__name')\
+            .values_list('pk', 'auth_group_id', 'auth_group__name',
+                         'researchgroup_id', 'researchgroup__group_name', 'ranking')
+
+        granted = {}
+        rows = AuthGroup.permissions.through.objects\
+            .filter(group__rankedpermissions__ranking__in=list(profiles))\
+            .values_list('group_id', 'permission__content_type__app_label', 'permission__codename')\
+            .distinct()
+        for group_id, app_label, codename in rows:
+            granted.setdefault(group_id, set()).add(f'{app_label}.{codename}')
+
+        report = []
+        for pk, auth_group_id, auth_group, researchgroup_id, researchgroup, ranking in ranked:
+            profile = profiles[ranking]
+            permissions = granted.get(auth_group_id, set())
+            missing = sorted(templates[profile] - permissions)
+            extra = sorted(permissions - templates[profile])
+
+            if only_drift and not missing and not extra:
+                continue
+
+            report.append({
+                'permissions_id': pk,
+                'auth_group': auth_group,
+                'researchgroup_id': researchgroup_id,
+                'researchgroup': researchgroup,
+                'profile': profile,
+                'ranking': ranking,
+                'missing': missing,
+                'extra': extra,
+            })
+
+        return report
+
+    def _write_csv(self, report):
+        fields = ['permissions_id', 'auth_group', 'researchgroup_id', 'researchgroup',
+                  'profile', 'ranking', 'missing', 'extra']
+        writer = csv.DictWriter(self.stdout, fieldnames=fields)
+        writer.writeheader()
+        for row in report:
+            writer.writerow(dict(row, missing=' '.join(row['missing']), extra=' '.join(row['extra'])))
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+
+from permissions.snapshot import SNAPSHOT_CHUNK_SIZE
+from permissions.snapshot import SNAPSHOT_MODELS
+from permissions.snapshot import write_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Write a columnar snapshot of the objects each user can access'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Directory where the snapshot is written')
+
+        parser.add_argument(
+            '--models',
+            nargs='+',
+            default=list(SNAPSHOT_MODELS),
+            dest='models',
+            help='Models included in the snapshot, as app_label.model',
+        )
+
+        parser.add_argument(
+            '--ids',
+            action='store_true',
+            dest='ids',
+            help='Store the ids of the accessible objects, not only their number',
+        )
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            dest='workers',
+            help='Number of processes computing the matrix in parallel',
+        )
+
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=SNAPSHOT_CHUNK_SIZE,
+            dest='chunk_size',
+            help='Number of users processed in each chunk',
+        )
+
+    def handle(self, *args, **options):
+        meta = write_snapshot(
+            options['path'],
+            model_names=options['models'],
+            with_ids=options['ids'],
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot of {meta['users']} users and {len(meta['models'])} models "
+            f"written to {options['path']}"
+        ))
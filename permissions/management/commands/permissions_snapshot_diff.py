@@ -0,0 +1,55 @@
+import csv
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from permissions.snapshot import Snapshot
+from permissions.snapshot import diff_snapshots
+
+
+class Command(BaseCommand):
+    help = 'List the users who gained or lost access between two snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument('before', help='Directory of the older snapshot')
+        parser.add_argument('after', help='Directory of the newer snapshot')
+
+        parser.add_argument(
+            '--format',
+            choices=('json', 'csv'),
+            default='json',
+            dest='format',
+            help='Output format',
+        )
+
+    def handle(self, *args, **options):
+        before = Snapshot(options['before'])
+        after = Snapshot(options['after'])
+
+        try:
+            changes = list(diff_snapshots(before, after))
+        finally:
+            before.close()
+            after.close()
+
+        usernames = dict(
+            User.objects
+            .filter(pk__in={change['user_id'] for change in changes})
+            .values_list('pk', 'username')
+        )
+        for change in changes:
+            change['username'] = usernames.get(change['user_id'])
+
+        if options['format'] == 'csv':
+            fields = ['user_id', 'username', 'model', 'before', 'after', 'gained', 'lost']
+            writer = csv.DictWriter(self.stdout, fieldnames=fields)
+            writer.writeheader()
+            for change in changes:
+                writer.writerow(dict(
+                    change,
+                    gained=' '.join(map(str, change.get('gained', []))),
+                    lost=' '.join(map(str, change.get('lost', []))),
+                ))
+        else:
+            self.stdout.write(json.dumps(changes, indent=2))
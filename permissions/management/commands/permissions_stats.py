@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from permissions.instrumentation import QUERIES_BUCKETS
+from permissions.instrumentation import TIME_BUCKETS_MS
+from permissions.instrumentation import CacheSink
+from permissions.instrumentation import Histogram
+from permissions.instrumentation import get_sinks
+from permissions.instrumentation import render_text
+
+
+def _bound(value):
+    return '-' if value is None else f'{value:g}'
+
+
+class Command(BaseCommand):
+    help = 'Show the statistics of the instrumented permissions operations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=('table', 'text'),
+            default='table',
+            dest='format',
+            help='Table, or the Prometheus text exposition format',
+        )
+
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            dest='reset',
+            help='Clear the statistics after showing them',
+        )
+
+    def handle(self, *args, **options):
+        sinks = [sink for sink in get_sinks() if isinstance(sink, CacheSink)]
+        if not sinks:
+            raise CommandError(
+                'Add permissions.instrumentation.CacheSink to the '
+                'PERMISSIONS_INSTRUMENTATION_SINKS setting to collect '
+                'the statistics of all the processes')
+        sink = sinks[0]
+        snapshot = sink.snapshot()
+
+        if options['format'] == 'text':
+            self.stdout.write(render_text(snapshot), ending='')
+        else:
+            self._table(snapshot)
+
+        if options['reset']:
+            sink.reset()
+
+    def _table(self, snapshot):
+        self.stdout.write(
+            f'{"OPERATION":45} {"COUNT":>8} {"MEAN ms":>9} {"P50 ms":>8} '
+            f'{"P95 ms":>8} {"QUERIES":>8} {"P95 Q":>6}')
+        for name, histograms in sorted(snapshot['operations'].items()):
+            time_ms = Histogram(TIME_BUCKETS_MS, histograms['time_ms']['buckets'], histograms['time_ms']['sum'])
+            queries = Histogram(QUERIES_BUCKETS, histograms['queries']['buckets'], histograms['queries']['sum'])
+            count = time_ms.count
+            if not count:
+                continue
+            self.stdout.write(
+                f'{name:45} {count:8} {time_ms.sum / count:9.2f} '
+                f'{_bound(time_ms.quantile(0.5)):>8} {_bound(time_ms.quantile(0.95)):>8} '
+                f'{queries.sum / count:8.1f} {_bound(queries.quantile(0.95)):>6}')
+
+        self.stdout.write('')
+        self.stdout.write(f'{"CACHE":45} {"HITS":>8} {"MISSES":>8} {"HIT RATIO":>10}')
+        for name, (hits, misses) in sorted(snapshot['caches'].items()):
+            ratio = hits / (hits + misses) if hits + misses else 0
+            self.stdout.write(f'{name:45} {hits:8} {misses:8} {ratio:10.1%}')
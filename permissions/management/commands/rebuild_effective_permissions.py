@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from permissions.models import EffectivePermission
+from permissions.models.effective_permission import effective_permissions_enabled
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the effective permissions table from the ranked permissions'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = EffectivePermission.objects.rebuild()
+        self.stdout.write(f'{count} effective permissions written in {time.perf_counter() - start:.3f}s')
+
+        if not effective_permissions_enabled():
+            self.stdout.write(self.style.WARNING(
+                'PERMISSIONS_EFFECTIVE_PERMISSIONS is not enabled, '
+                'the table is not kept up to date'))
@@ -1,90 +1,24 @@
 from django.contrib.auth.models import Group as AuthGroup
-from django.contrib.auth.models import Permission
-from django.contrib.contenttypes.models import ContentType
 from django.core.management.base import BaseCommand
 
+from django.db import transaction
+
+from permissions.models import DirtyResearchGroup
 from permissions.models import Permission as RankedPermissions
+from permissions.profile_sync import ProfileSync
+from permissions.profiles import PROFILE_GROUP_NAME_TEMPLATE
+from permissions.profiles import PROFILE_RANKS
+from permissions.profiles import get_default_permissions
 from people.models import Group as ResearchGroup
 from people.models import GroupType as ResearchGroupType
 
-from humanresources.models import Contract
-from humanresources.models import ContractProposal
-from people.models import Person
-from orders.models import Order
-
-
-PROFILE_GROUP_NAME_TEMPLATE = 'PROFILE: Group {}: {}'
-
-PROFILE_RANKS = {
-    'coordinator': 300,
-    'admin': 200,
-    'manager': 100,
-}
-
-
-def get_permission(model, codename):
-    content_type = ContentType.objects.get_for_model(model)
-    if codename in ('add', 'view', 'change', 'delete'):
-        codename = f'{codename}_{content_type.model}'
-    return Permission.objects.get(
-        content_type=content_type,
-        codename=codename,
-    )
-
-
-DEFAULT_PERMISSIONS = {
-    'coordinator': {
-        get_permission(Person, 'view'),
-        get_permission(Person, 'change'),
-        get_permission(Person, 'app_access_people'),
-
-        get_permission(ContractProposal, 'add'),
-        get_permission(ContractProposal, 'view'),
-        get_permission(ContractProposal, 'change'),
-
-        get_permission(Contract, 'view'),
-
-        get_permission(Order, 'add'),
-        get_permission(Order, 'view'),
-        get_permission(Order, 'change'),
-        get_permission(Order, 'delete'),
-        get_permission(Order, 'app_access_orders'),
-    },
-    'admin': {
-        get_permission(Person, 'view'),
-        get_permission(Person, 'change'),
-        get_permission(Person, 'app_access_people'),
-
-        get_permission(ContractProposal, 'add'),
-        get_permission(ContractProposal, 'view'),
-        get_permission(ContractProposal, 'change'),
-
-        get_permission(Contract, 'view'),
-
-        get_permission(Order, 'add'),
-        get_permission(Order, 'view'),
-        get_permission(Order, 'change'),
-        get_permission(Order, 'delete'),
-        get_permission(Order, 'app_access_orders'),
-    },
-    'manager': {
-        get_permission(Person, 'view'),
-        get_permission(Person, 'change'),
-        get_permission(Person, 'app_access_people'),
-
-        get_permission(ContractProposal, 'add'),
-        get_permission(ContractProposal, 'view'),
-        get_permission(ContractProposal, 'change'),
-
-        get_permission(Contract, 'view'),
-
-        get_permission(Order, 'add'),
-        get_permission(Order, 'view'),
-        get_permission(Order, 'change'),
-        get_permission(Order, 'delete'),
-        get_permission(Order, 'app_access_orders'),
-    },
-}
+
+def __getattr__(name):
+    # DEFAULT_PERMISSIONS is resolved on first use to keep the module
+    # import free of database queries
+    if name == 'DEFAULT_PERMISSIONS':
+        return get_default_permissions()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 class Command(BaseCommand):
@@ -107,10 +41,46 @@ class Command(BaseCommand):
                 help='Set the default permissions',
             )
 
+            parser.add_argument(
+                '--bulk',
+                action='store_true',
+                dest='bulk',
+                help='Plan the changes for all groups at once and apply them in bulk',
+            )
+
+            parser.add_argument(
+                '--changed-only',
+                action='store_true',
+                dest='changed_only',
+                help='Synchronize only the research groups changed since the last run',
+            )
+
+            parser.add_argument(
+                '--debounce',
+                type=int,
+                default=60,
+                dest='debounce',
+                help='With --changed-only, skip groups changed in the last DEBOUNCE seconds',
+            )
+
+            parser.add_argument(
+                '--dry-run',
+                action='store_true',
+                dest='dry_run',
+                help='Show the changes planned by --bulk without applying them',
+            )
+
     def handle(self,  *args, **options):
 
         if options['list']:
             self._list_groups()
+        elif options['changed_only']:
+            self._sync_changed(**options)
+        elif options['bulk'] or options['dry_run']:
+            research_groups = ResearchGroup.objects.all()
+            if options['group_id']:
+                research_groups = research_groups.filter(group_id__in=options['group_id'])
+            self._sync_bulk(research_groups, **options)
         elif options['group_id']:
             # sync the selected groups
             for group_id in options['group_id']:
@@ -131,6 +101,53 @@ class Command(BaseCommand):
         for group in ResearchGroup.objects.all().order_by('pk'):
             self.stdout.write(f'[{group.group_id:2}]\t{group.group_name}')
 
+    def _sync_changed(self, **options):
+        dirty = DirtyResearchGroup.objects.settled(options['debounce'])
+        marked = dict(dirty.values_list('researchgroup_id', 'marked_at'))
+
+        self.stdout.write(f'{len(marked)} research groups changed')
+        if not marked:
+            return
+
+        with transaction.atomic():
+            research_groups = ResearchGroup.objects.filter(pk__in=list(marked))
+            self._sync_bulk(research_groups, **options)
+
+            if not options['dry_run']:
+                # groups marked again during the sync are kept for the next run
+                DirtyResearchGroup.objects.filter(
+                    researchgroup_id__in=list(marked),
+                    marked_at__lte=max(marked.values()),
+                ).delete()
+
+    def _sync_bulk(self, research_groups, **options):
+        sync = ProfileSync(research_groups, default=options['default'])
+
+        for plan in sync.plan():
+            changes = []
+            if plan.create:
+                changes.append('create')
+            if plan.permissions_to_add:
+                changes.append(f'+{len(plan.permissions_to_add)} permissions')
+            if plan.head_user_id:
+                changes.append('add group head')
+
+            if plan.drift:
+                status = self.style.ERROR(u'\uFF01')
+            else:
+                status = self.style.SUCCESS(u'\u2714')
+
+            line = f'[{plan.research_group.group_id:2}] {plan.profile.title():14}{status} {plan.name}'
+            if changes:
+                line += ': ' + ', '.join(changes)
+            self.stdout.write(line)
+
+        if not options['dry_run']:
+            sync.apply()
+
+        for phase, duration in sync.timings.items():
+            self.stdout.write(f'{phase}: {duration:.3f}s')
+
     def _sync_group(self, research_group, **options):
         self.stdout.write("Synchronizing Research Group "
                           f"[{research_group.group_id:2}] {research_group}")
@@ -172,12 +189,14 @@ class Command(BaseCommand):
                     ranking=PROFILE_RANKS[profile],
                 )
 
+            default_permissions = get_default_permissions()[profile]
+
             if created or options['default']:
-                auth_group.permissions.add(*DEFAULT_PERMISSIONS[profile])
+                auth_group.permissions.add(*default_permissions)
 
             # check if current permissions are the default ones
             permissions_set = set(auth_group.permissions.all())
-            symdiff = DEFAULT_PERMISSIONS[profile] ^ permissions_set
+            symdiff = default_permissions ^ permissions_set
 
             if symdiff:
                 status = self.style.ERROR(u'\uFF01')
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0001_initial'),
+        ('permissions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyResearchGroup',
+            fields=[
+                ('researchgroup', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='people.Group', verbose_name='Research group')),
+                ('marked_at', models.DateTimeField(auto_now=True, verbose_name='Marked at')),
+            ],
+            options={
+                'ordering': ['marked_at'],
+            },
+        ),
+    ]
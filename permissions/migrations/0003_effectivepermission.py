@@ -0,0 +1,34 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('people', '0001_initial'),
+        ('permissions', '0002_dirtyresearchgroup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EffectivePermission',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codename', models.CharField(max_length=100, verbose_name='Codename')),
+                ('ranking', models.PositiveSmallIntegerField(verbose_name='Rank')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.ContentType')),
+                ('researchgroup', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='people.Group', verbose_name='Research group')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='auth.User')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='effectivepermission',
+            index=models.Index(fields=['researchgroup', 'content_type', 'codename'], name='permissions_effective_rg_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='effectivepermission',
+            unique_together={('user', 'content_type', 'codename', 'researchgroup')},
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permissions', '0003_effectivepermission'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='effectivepermission',
+            constraint=models.UniqueConstraint(condition=models.Q(researchgroup__isnull=True), fields=('user', 'content_type', 'codename'), name='permissions_effective_global_uniq'),
+        ),
+    ]
@@ -1 +1,3 @@
-from .permission import Permission
\ No newline at end of file
+from .permission import Permission
+from .dirty_research_group import DirtyResearchGroup
+from .effective_permission import EffectivePermission
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.db import models
+from django.utils import timezone
+
+
+class DirtyResearchGroupQuerySet(models.QuerySet):
+
+    def mark(self, group_ids):
+        """Record the research groups whose profiles need to be synchronized.
+        Marking a group again only refreshes its timestamp.
+        """
+        for group_id in set(group_ids):
+            self.model(researchgroup_id=group_id).save()
+
+    def settled(self, debounce=0):
+        """Groups not changed during the last `debounce` seconds."""
+        cutoff = timezone.now() - timedelta(seconds=debounce)
+        return self.filter(marked_at__lte=cutoff)
+
+
+class DirtyResearchGroup(models.Model):
+    """
+    Research group changed since the last synchronization of its profiles
+    """
+    researchgroup = models.OneToOneField('people.Group', primary_key=True, related_name='+', verbose_name='Research group', on_delete=models.CASCADE)
+    marked_at = models.DateTimeField('Marked at', auto_now=True)
+
+    objects = DirtyResearchGroupQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['marked_at']
+
+    def __str__(self):
+        return str(self.researchgroup)
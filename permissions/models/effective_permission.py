@@ -0,0 +1,206 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.db import transaction
+from django.db.models import Exists
+from django.db.models import Max
+from django.db.models import Q
+
+from .permission_queryset import RANKS_BATCH_SIZE
+from .permission_queryset import expand_codenames
+
+
+def effective_permissions_enabled():
+    """The table is maintained, and read by `ranks_by_user`, only
+    when the `PERMISSIONS_EFFECTIVE_PERMISSIONS` setting is True.
+    """
+    return getattr(settings, 'PERMISSIONS_EFFECTIVE_PERMISSIONS', False)
+
+
+def _batches(ids):
+    ids = sorted(set(ids))
+    return [ids[i:i + RANKS_BATCH_SIZE] for i in range(0, len(ids), RANKS_BATCH_SIZE)]
+
+
+class EffectivePermissionQuerySet(models.QuerySet):
+
+    def expected(self, user_ids):
+        """Compute the rows of the users from the ranked permissions of their
+        auth groups, in one query. Returns a dict
+        {(user id, research group id, content type id, codename): ranking}.
+        """
+        from .permission import Permission as RankedPermission
+
+        rows = RankedPermission.objects\
+            .filter(auth_group__user__in=user_ids, auth_group__permissions__isnull=False)\
+            .order_by()\
+            .values_list(
+                'auth_group__user',
+                'researchgroup',
+                'auth_group__permissions__content_type',
+                'auth_group__permissions__codename',
+            )\
+            .annotate(rank=Max('ranking'))
+
+        return {row[:4]: row[4] for row in rows}
+
+    def _current(self, user_ids):
+        rows = self.filter(user_id__in=user_ids).values_list(
+            'pk', 'user_id', 'researchgroup_id', 'content_type_id', 'codename', 'ranking')
+        return {row[1:5]: (row[0], row[5]) for row in rows}
+
+    def _new_rows(self, keys, expected):
+        return [
+            self.model(
+                user_id=user_id,
+                researchgroup_id=researchgroup_id,
+                content_type_id=content_type_id,
+                codename=codename,
+                ranking=expected[(user_id, researchgroup_id, content_type_id, codename)],
+            )
+            for user_id, researchgroup_id, content_type_id, codename in keys
+        ]
+
+    def sync_users(self, user_ids):
+        """Bring the rows of the users up to date, writing only the rows
+        that changed. Returns the number of rows created and deleted.
+        The users rows are locked, so concurrent syncs of the same users
+        run one after the other.
+        """
+        created = deleted = 0
+
+        with transaction.atomic():
+            for batch in _batches(user_ids):
+                list(User.objects.select_for_update().filter(pk__in=batch).order_by('pk').values_list('pk'))
+
+                expected = self.expected(batch)
+                current = self._current(batch)
+
+                stale = [
+                    pk for key, (pk, ranking) in current.items()
+                    if expected.get(key) != ranking
+                ]
+                missing = [
+                    key for key, ranking in expected.items()
+                    if current.get(key, (None, None))[1] != ranking
+                ]
+
+                if stale:
+                    self.model.objects.filter(pk__in=stale).delete()
+                self.bulk_create(self._new_rows(missing, expected), ignore_conflicts=True)
+
+                created += len(missing)
+                deleted += len(stale)
+
+        return created, deleted
+
+    def rebuild(self):
+        """Replace all the rows with the ones computed from the ranked permissions.
+        Returns the number of rows.
+        """
+        user_ids = User.groups.through.objects.values_list('user_id', flat=True).distinct()
+
+        count = 0
+        with transaction.atomic():
+            self.model.objects.all().delete()
+            for batch in _batches(user_ids):
+                expected = self.expected(batch)
+                self.bulk_create(self._new_rows(expected, expected), ignore_conflicts=True)
+                count += len(expected)
+        return count
+
+    def differences(self):
+        """Generate the rows that differ from the ones computed from the ranked
+        permissions, as (user id, research group id, content type id, codename,
+        expected ranking, current ranking), None for a missing ranking.
+        """
+        user_ids = set(User.groups.through.objects.values_list('user_id', flat=True))
+        user_ids.update(self.model.objects.values_list('user_id', flat=True))
+
+        for batch in _batches(user_ids):
+            expected = self.expected(batch)
+            current = {key: ranking for key, (_, ranking) in self._current(batch).items()}
+
+            for key in sorted(set(expected) | set(current), key=str):
+                if expected.get(key) != current.get(key):
+                    yield key + (expected.get(key), current.get(key))
+
+    def for_permission(self, user, model, codenames):
+        """Rows granting the user one of the codenames of the model,
+        a lookup on the (user, content type, codename) index.
+        """
+        return self.filter(
+            user=user,
+            content_type=ContentType.objects.get_for_model(model),
+            codename__in=expand_codenames(model, codenames),
+        )
+
+    def exists_for(self, user, model, codenames, **lookups):
+        """Return an `Exists` expression, the indexed counterpart of
+        `Permission.objects.exists_by_auth_permissions`, for example:
+
+            Contract.objects.annotate(
+                allowed=EffectivePermission.objects.exists_for(
+                    user, Contract, ['view'],
+                    researchgroup=OuterRef('person__group'),
+                )
+            ).filter(allowed=True)
+        """
+        queryset = self.for_permission(user, model, codenames).filter(**lookups)
+        return Exists(queryset.order_by().values('pk'))
+
+    def ranks_by_user(self, users, model, codenames):
+        """Same result as `Permission.objects.ranks_by_user`, read from the table."""
+        queryset = self.filter(
+            content_type=ContentType.objects.get_for_model(model),
+            codename__in=expand_codenames(model, codenames),
+        )
+
+        if isinstance(users, models.QuerySet):
+            batches = [users.values('pk')]
+        else:
+            batches = _batches(getattr(user, 'pk', user) for user in users)
+
+        ranks = {}
+        for batch in batches:
+            rows = queryset.filter(user__in=batch)\
+                .order_by()\
+                .values_list('user', 'researchgroup')\
+                .annotate(rank=Max('ranking'))
+
+            for user_id, researchgroup_id, rank in rows:
+                ranks.setdefault(user_id, {})[researchgroup_id] = rank
+
+        return ranks
+
+
+class EffectivePermission(models.Model):
+    """
+    Highest rank of a permission of a user in a research group, derived from
+    the ranked permissions of the user auth groups
+    """
+    user = models.ForeignKey('auth.User', related_name='+', on_delete=models.CASCADE)
+    researchgroup = models.ForeignKey('people.Group', related_name='+', verbose_name='Research group', blank=True, null=True, on_delete=models.CASCADE)
+    content_type = models.ForeignKey('contenttypes.ContentType', related_name='+', on_delete=models.CASCADE)
+    codename = models.CharField('Codename', max_length=100)
+    ranking = models.PositiveSmallIntegerField('Rank')
+
+    objects = EffectivePermissionQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('user', 'content_type', 'codename', 'researchgroup')
+        constraints = [
+            # the unique together does not apply to the rows without research group
+            models.UniqueConstraint(
+                fields=['user', 'content_type', 'codename'],
+                condition=Q(researchgroup__isnull=True),
+                name='permissions_effective_global_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['researchgroup', 'content_type', 'codename'], name='permissions_effective_rg_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} - {self.researchgroup_id} - {self.codename}: {self.ranking}'
@@ -1,8 +1,7 @@
 from django.db import models
-from django.contrib.contenttypes.models import ContentType
-from django.contrib.auth.models import Permission
 
 from .permission_queryset import PermissionQuerySet
+from .permissions_summary import PermissionsSummary
 
 class Permission(models.Model):
     """
@@ -29,18 +28,10 @@ class Permission(models.Model):
         )
 
     def __list_permissions(self, model):
-        contenttype = ContentType.objects.get_for_model(model)
-        
-        html = "<div class='ui list'>"
-        for obj in Permission.objects.filter(content_type=contenttype).order_by('name'):
-            if obj in self.auth_group.permissions.all():
-                icon = "check circle green"
-            else:
-                icon = "times circle red"
-            html += "<div class='item'><i class='{}  icon'></i>{}</div>".format(icon, obj.name)
-        html += '</div>'
-
-        return html
+        summary = getattr(self, '_permissions_summary', None)
+        if summary is None:
+            summary = PermissionsSummary([self.auth_group_id], [model])
+        return summary.render(self.auth_group_id, model)
 
 
     @property
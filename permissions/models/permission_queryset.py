@@ -1,9 +1,35 @@
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.db.models import Exists
+from django.db.models import Max
+from django.db.models import OuterRef
+
+from ..instrumentation import instrumented
+from .permissions_summary import PermissionsSummaryIterable
+
+
+DEFAULT_CODENAMES = ('add', 'view', 'change', 'delete')
+
+# Maximum number of users filtered in each query of `ranks_by_user`,
+# keeps the query below the parameters limit of the database backends.
+RANKS_BATCH_SIZE = 500
+
+
+def expand_codenames(model, codenames):
+    """Return a tuple with the default actions of `codenames`
+    ('add', 'view', 'change' and 'delete') expanded to the model codenames.
+    The list received is not changed.
+    """
+    model_name = model._meta.concrete_model._meta.model_name
+    return tuple(
+        f'{codename}_{model_name}' if codename in DEFAULT_CODENAMES else codename
+        for codename in codenames
+    )
 
 
 class PermissionQuerySet(models.QuerySet):
 
+    @instrumented('filter_by_auth_permissions')
     def filter_by_auth_permissions(self, user, model, codenames):
         """Auxiliary method that inspects the RankedPermissions table
         to check if the user belongs to a group with the required permissions.
@@ -12,18 +38,7 @@ class PermissionQuerySet(models.QuerySet):
         """
 
         contenttype = ContentType.objects.get_for_model(model)
-
-        for i, codename in enumerate(codenames):
-            if codename in ['add', 'view', 'change', 'delete']:
-                codenames[i] = f'{codename}_{contenttype.model}'
-
-        # print('REQUIRED PERMISSIONS:', required_permissions)
-
-        # print('USER SUMMARY')
-        # for g in user.groups.all():
-        #     print(g.name)
-        #     for p in g.permissions.all():
-        #         print('\t', p.codename)
+        codenames = expand_codenames(model, codenames)
 
         # Search for the user auth groups with necessary permissions
         auth_groups = user.groups.filter(
@@ -32,3 +47,90 @@ class PermissionQuerySet(models.QuerySet):
         )
 
         return self.filter(auth_group__in=auth_groups)
+
+    def exists_by_auth_permissions(self, user, model, codenames, **lookups):
+        """Return an `Exists` expression checking if the user belongs to an
+        auth group, with one of the required permissions, ranked in the rows
+        matching `lookups`. Use `OuterRef` in the lookups to correlate it with
+        the model being listed, for example in `list_permissions`:
+
+            Contract.objects.annotate(
+                allowed=RankedPermission.objects.exists_by_auth_permissions(
+                    user, Contract, ['view'],
+                    researchgroup=OuterRef('person__group'),
+                )
+            ).filter(allowed=True)
+
+        The whole check runs as a single correlated subquery.
+        """
+        opts = model._meta.concrete_model._meta
+
+        queryset = self.filter(
+            auth_group__user=user,
+            auth_group__permissions__content_type__app_label=opts.app_label,
+            auth_group__permissions__content_type__model=opts.model_name,
+            auth_group__permissions__codename__in=expand_codenames(model, codenames),
+            **lookups
+        )
+        return Exists(queryset.order_by().values('pk'))
+
+    def with_auth_permissions(self, user, model, codenames):
+        """Same rows as `filter_by_auth_permissions`, filtered with a single
+        `EXISTS` subquery and without looking up the ContentType.
+        """
+        exists = self.model.objects.exists_by_auth_permissions(
+            user, model, codenames, pk=OuterRef('pk'))
+        return self.annotate(_auth_permissions=exists).filter(_auth_permissions=True)
+
+    def with_permissions_summary(self):
+        """Render the permissions columns of the rows fetched together,
+        such as a page of the list, from a single `PermissionsSummary`.
+        """
+        clone = self._chain()
+        clone._iterable_class = PermissionsSummaryIterable
+        return clone
+
+    def ranks_by_user(self, users, model, codenames):
+        """Resolve the strongest profile of many users at once.
+
+        Returns a dict {user id: {research group id: max ranking}} for the
+        users belonging to ranked auth groups with one of the required
+        permissions. `users` may be a User queryset, resolved in a single
+        query, or an iterable of users or user ids, resolved in one query
+        for each `RANKS_BATCH_SIZE` users. Read from the effective
+        permissions table when it is enabled.
+        """
+        from .effective_permission import EffectivePermission
+        from .effective_permission import effective_permissions_enabled
+
+        if effective_permissions_enabled():
+            return EffectivePermission.objects.ranks_by_user(users, model, codenames)
+
+        opts = model._meta.concrete_model._meta
+
+        queryset = self.filter(
+            auth_group__permissions__content_type__app_label=opts.app_label,
+            auth_group__permissions__content_type__model=opts.model_name,
+            auth_group__permissions__codename__in=expand_codenames(model, codenames),
+        )
+
+        if isinstance(users, models.QuerySet):
+            batches = [users.values('pk')]
+        else:
+            user_ids = [getattr(user, 'pk', user) for user in users]
+            batches = [
+                user_ids[i:i + RANKS_BATCH_SIZE]
+                for i in range(0, len(user_ids), RANKS_BATCH_SIZE)
+            ]
+
+        ranks = {}
+        for batch in batches:
+            rows = queryset.filter(auth_group__user__in=batch)\
+                .order_by()\
+                .values_list('auth_group__user', 'researchgroup')\
+                .annotate(rank=Max('ranking'))
+
+            for user_id, researchgroup_id, rank in rows:
+                ranks.setdefault(user_id, {})[researchgroup_id] = rank
+
+        return ranks
@@ -0,0 +1,169 @@
+import uuid
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import Group as AuthGroup
+from django.contrib.auth.models import Permission as AuthPermission
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models.query import ModelIterable
+
+from ..instrumentation import instrumented
+from ..instrumentation import record_cache
+
+
+# Models summarized in the columns of the permissions list
+SUMMARY_MODELS = (
+    'orders.order',
+    'humanresources.contractproposal',
+    'humanresources.contract',
+    'people.person',
+    'research.publication',
+)
+
+SUMMARY_VERSION_KEY = 'permissions:summary:version:{}'
+SUMMARY_CATALOGUE_VERSION_KEY = 'permissions:summary:catalogue'
+SUMMARY_KEY = 'permissions:summary:{group}:{version}:{catalogue}:{content_type}'
+
+
+def summary_models():
+    """Return the installed models of `SUMMARY_MODELS`."""
+    models = []
+    for label in SUMMARY_MODELS:
+        try:
+            models.append(apps.get_model(label))
+        except LookupError:
+            continue
+    return models
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def invalidate_summary(auth_group_ids):
+    """Bump the summary version of the auth groups, in every process."""
+    cache.set_many(
+        {SUMMARY_VERSION_KEY.format(pk): _new_version() for pk in set(auth_group_ids)},
+        None,
+    )
+
+
+def invalidate_summary_catalogue():
+    """Bump the version of all summaries, after the permissions catalogue changed."""
+    cache.set(SUMMARY_CATALOGUE_VERSION_KEY, _new_version(), None)
+
+
+class PermissionsSummary:
+    """Permissions of a set of auth groups for the given models.
+
+    The HTML of each (auth group, model) pair is cached under the version
+    of the auth group, bumped when its permissions change. The pairs not
+    cached are rendered after loading, in two queries, the permissions
+    catalogue of the models and the permissions granted to the groups.
+    """
+
+    def __init__(self, auth_group_ids, models):
+        self._auth_group_ids = set(auth_group_ids)
+        self._content_types = ContentType.objects.get_for_models(*models)
+        self._html = None
+
+    def _keys(self):
+        """Return the cache key of each (auth group, content type) pair."""
+        version_keys = {pk: SUMMARY_VERSION_KEY.format(pk) for pk in self._auth_group_ids}
+        versions = cache.get_many(
+            list(version_keys.values()) + [SUMMARY_CATALOGUE_VERSION_KEY])
+
+        # unknown versions are started with a fresh value
+        missing = {
+            key: _new_version() for key in version_keys.values()
+            if key not in versions
+        }
+        if SUMMARY_CATALOGUE_VERSION_KEY not in versions:
+            missing[SUMMARY_CATALOGUE_VERSION_KEY] = _new_version()
+        if missing:
+            cache.set_many(missing, None)
+            versions.update(missing)
+
+        return {
+            (group_id, content_type.pk): SUMMARY_KEY.format(
+                group=group_id,
+                version=versions[version_key],
+                catalogue=versions[SUMMARY_CATALOGUE_VERSION_KEY],
+                content_type=content_type.pk,
+            )
+            for group_id, version_key in version_keys.items()
+            for content_type in self._content_types.values()
+        }
+
+    @instrumented('permissions_summary')
+    def _load(self):
+        keys = self._keys()
+        cached = cache.get_many(list(keys.values()))
+
+        self._html = {pair: cached[key] for pair, key in keys.items() if key in cached}
+
+        missing = [pair for pair in keys if pair not in self._html]
+        record_cache('permissions_summary', hits=len(self._html), misses=len(missing))
+        if not missing:
+            return
+
+        catalogue = defaultdict(list)
+        permissions = AuthPermission.objects\
+            .filter(content_type__in={content_type_id for _, content_type_id in missing})\
+            .order_by('name')\
+            .values_list('pk', 'content_type_id', 'name')
+        for pk, content_type_id, name in permissions:
+            catalogue[content_type_id].append((pk, name))
+
+        granted = defaultdict(set)
+        rows = AuthGroup.permissions.through.objects\
+            .filter(group_id__in={group_id for group_id, _ in missing})\
+            .values_list('group_id', 'permission_id')
+        for group_id, permission_id in rows:
+            granted[group_id].add(permission_id)
+
+        rendered = {}
+        for group_id, content_type_id in missing:
+            html = self._render(catalogue[content_type_id], granted[group_id])
+            self._html[(group_id, content_type_id)] = html
+            rendered[keys[(group_id, content_type_id)]] = html
+
+        timeout = getattr(settings, 'PERMISSIONS_SUMMARY_CACHE_TIMEOUT', 60 * 60 * 24)
+        cache.set_many(rendered, timeout)
+
+    @staticmethod
+    def _render(catalogue, granted):
+        html = "<div class='ui list'>"
+        for pk, name in catalogue:
+            if pk in granted:
+                icon = "check circle green"
+            else:
+                icon = "times circle red"
+            html += "<div class='item'><i class='{}  icon'></i>{}</div>".format(icon, name)
+        html += '</div>'
+
+        return html
+
+    def render(self, auth_group_id, model):
+        if self._html is None:
+            self._load()
+        return self._html[(auth_group_id, self._content_types[model].pk)]
+
+
+class PermissionsSummaryIterable(ModelIterable):
+    """Loads one `PermissionsSummary` for all the rows fetched together,
+    for example a page of the permissions list, and shares it between them.
+    """
+
+    def __iter__(self):
+        rows = list(super().__iter__())
+
+        if rows:
+            summary = PermissionsSummary(
+                {row.auth_group_id for row in rows}, summary_models())
+            for row in rows:
+                row._permissions_summary = summary
+
+        return iter(rows)
@@ -0,0 +1,28 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import connections
+
+
+def _setup_worker():
+    # a no-op in forked workers, which inherit the configured Django
+    django.setup()
+
+
+def process_pool(workers):
+    """Return a process pool for the work split in chunks by the commands.
+
+    The workers are forked where the platform allows it, and set Django up
+    from DJANGO_SETTINGS_MODULE otherwise (spawn and forkserver start
+    methods). The database connections are closed first, so each worker
+    opens its own.
+    """
+    connections.close_all()
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_setup_worker)
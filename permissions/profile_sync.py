@@ -0,0 +1,209 @@
+import time
+from collections import namedtuple
+
+from django.contrib.auth.models import Group as AuthGroup
+from django.contrib.auth.models import Permission
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import m2m_changed
+
+from .models import Permission as RankedPermissions
+from .profiles import PROFILE_GROUP_NAME_TEMPLATE
+from .profiles import PROFILE_RANKS
+from .profiles import get_default_permissions
+from .search import AUTH_GROUPS_INDEX
+from .search import invalidate_search_index
+
+
+PROFILE_NAME_PREFIX = PROFILE_GROUP_NAME_TEMPLATE.split('{')[0]
+
+PLATFORMS_GROUP_TYPE = 'Platforms'
+
+
+ProfilePlan = namedtuple('ProfilePlan', [
+    'research_group',
+    'profile',
+    'name',
+    'auth_group_id',         # None if the auth group does not exist yet
+    'create',                # True if the auth group and its ranking are created
+    'permissions_to_add',    # set of Permission ids
+    'head_user_id',          # user to add to the auth group, or None
+    'drift',                 # True if the permissions differ from the profile defaults
+])
+
+
+def profile_group_name(profile, research_group):
+    name = PROFILE_GROUP_NAME_TEMPLATE.format(
+        profile.title(), research_group.group_name)
+
+    if 'Advanced BioImaging and BioOptics Experimental Platform' in name:
+        # name too long for AuthGroup.name
+        name = name.replace(
+            'Advanced BioImaging and BioOptics Experimental Platform',
+            'ABBE'
+        )
+    return name
+
+
+def _is_platform(research_group):
+    grouptype = research_group.grouptype
+    return grouptype is not None and grouptype.grouptype_name == PLATFORMS_GROUP_TYPE
+
+
+class ProfileSync:
+    """Synchronize the ranked profiles of many research groups at once.
+
+    `plan` reads the current state in a fixed number of queries and
+    computes the changes, `apply` writes them with bulk inserts in a
+    single transaction. The duration of each phase is kept in `timings`.
+    """
+
+    def __init__(self, research_groups, default=False):
+        self.research_groups = research_groups
+        self.default = default
+        self.plans = []
+        self.timings = {}
+
+    def plan(self):
+        start = time.perf_counter()
+
+        research_groups = list(
+            self.research_groups.select_related('grouptype', 'person'))
+
+        auth_groups = dict(
+            AuthGroup.objects
+            .filter(name__startswith=PROFILE_NAME_PREFIX)
+            .values_list('name', 'pk')
+        )
+
+        group_permissions = {}
+        for group_id, permission_id in AuthGroup.permissions.through.objects\
+                .filter(group__name__startswith=PROFILE_NAME_PREFIX)\
+                .values_list('group_id', 'permission_id'):
+            group_permissions.setdefault(group_id, set()).add(permission_id)
+
+        group_users = set(
+            User.groups.through.objects
+            .filter(group__name__startswith=PROFILE_NAME_PREFIX)
+            .values_list('group_id', 'user_id')
+        )
+
+        default_permissions = {
+            profile: {perm.pk for perm in permissions}
+            for profile, permissions in get_default_permissions().items()
+        }
+
+        self.plans = []
+        creating = set()
+        for research_group in research_groups:
+            for profile in PROFILE_RANKS.keys():
+
+                if profile == 'coordinator' and not _is_platform(research_group):
+                    # coordinator are only configures for Platforms
+                    continue
+
+                name = profile_group_name(profile, research_group)
+                auth_group_id = auth_groups.get(name)
+                create = auth_group_id is None and name not in creating
+                if create:
+                    creating.add(name)
+                current = group_permissions.get(auth_group_id, set())
+                defaults = default_permissions[profile]
+
+                if create or self.default:
+                    to_add = defaults - current
+                else:
+                    to_add = set()
+
+                # make sure the Group Head is assigned to the Admin Profile
+                head_user_id = None
+                if profile == 'admin' and research_group.person is not None:
+                    head_user_id = research_group.person.auth_user_id
+                    if (auth_group_id, head_user_id) in group_users:
+                        head_user_id = None
+
+                self.plans.append(ProfilePlan(
+                    research_group=research_group,
+                    profile=profile,
+                    name=name,
+                    auth_group_id=auth_group_id,
+                    create=create,
+                    permissions_to_add=to_add,
+                    head_user_id=head_user_id,
+                    drift=bool(defaults ^ (current | to_add)),
+                ))
+
+        self.timings['plan'] = time.perf_counter() - start
+        return self.plans
+
+    def apply(self):
+        start = time.perf_counter()
+
+        with transaction.atomic():
+            new_names = [plan.name for plan in self.plans if plan.create]
+            AuthGroup.objects.bulk_create([AuthGroup(name=name) for name in new_names])
+            created = AuthGroup.objects.in_bulk(new_names, field_name='name')
+            if new_names:
+                # the bulk insert sends no post_save to the search receivers
+                transaction.on_commit(lambda: invalidate_search_index(AUTH_GROUPS_INDEX))
+
+            RankedPermissions.objects.bulk_create([
+                RankedPermissions(
+                    auth_group=created[plan.name],
+                    researchgroup=plan.research_group,
+                    ranking=PROFILE_RANKS[plan.profile],
+                )
+                for plan in self.plans if plan.create
+            ])
+
+            auth_groups = {
+                plan.name: plan.auth_group_id or created[plan.name].pk
+                for plan in self.plans
+            }
+
+            permissions_rows = {
+                (auth_groups[plan.name], permission_id)
+                for plan in self.plans
+                for permission_id in plan.permissions_to_add
+            }
+            permissions_through = AuthGroup.permissions.through
+            permissions_through.objects.bulk_create([
+                permissions_through(group_id=group_id, permission_id=permission_id)
+                for group_id, permission_id in permissions_rows
+            ])
+
+            users_rows = {
+                (auth_groups[plan.name], plan.head_user_id)
+                for plan in self.plans if plan.head_user_id
+            }
+            users_through = User.groups.through
+            users_through.objects.bulk_create([
+                users_through(group_id=group_id, user_id=user_id)
+                for group_id, user_id in users_rows
+            ])
+
+            self._send_m2m_changed(auth_groups)
+
+        self.timings['apply'] = time.perf_counter() - start
+
+    def _send_m2m_changed(self, auth_groups):
+        """The bulk inserts skip the m2m_changed signals, send them so the
+        caches depending on the groups permissions and members are updated.
+        """
+        instances = AuthGroup.objects.in_bulk(set(auth_groups.values()))
+
+        for plan in self.plans:
+            group = instances[auth_groups[plan.name]]
+
+            if plan.permissions_to_add:
+                m2m_changed.send(
+                    sender=AuthGroup.permissions.through, instance=group,
+                    action='post_add', reverse=False, model=Permission,
+                    pk_set=set(plan.permissions_to_add), using=group._state.db,
+                )
+            if plan.head_user_id:
+                m2m_changed.send(
+                    sender=User.groups.through, instance=group,
+                    action='post_add', reverse=True, model=User,
+                    pk_set={plan.head_user_id}, using=group._state.db,
+                )
@@ -0,0 +1,130 @@
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth.models import Permission
+from django.db.models import Q
+
+from .models.permission_queryset import DEFAULT_CODENAMES
+
+
+PROFILE_GROUP_NAME_TEMPLATE = 'PROFILE: Group {}: {}'
+
+PROFILE_RANKS = {
+    'coordinator': 300,
+    'admin': 200,
+    'manager': 100,
+}
+
+# Permissions of each profile as (model label, codename) pairs.
+# The codenames 'add', 'view', 'change' and 'delete' refer to the
+# default permissions of the model.
+PROFILE_PERMISSIONS = {
+    'coordinator': (
+        ('people.person', 'view'),
+        ('people.person', 'change'),
+        ('people.person', 'app_access_people'),
+
+        ('humanresources.contractproposal', 'add'),
+        ('humanresources.contractproposal', 'view'),
+        ('humanresources.contractproposal', 'change'),
+
+        ('humanresources.contract', 'view'),
+
+        ('orders.order', 'add'),
+        ('orders.order', 'view'),
+        ('orders.order', 'change'),
+        ('orders.order', 'delete'),
+        ('orders.order', 'app_access_orders'),
+    ),
+    'admin': (
+        ('people.person', 'view'),
+        ('people.person', 'change'),
+        ('people.person', 'app_access_people'),
+
+        ('humanresources.contractproposal', 'add'),
+        ('humanresources.contractproposal', 'view'),
+        ('humanresources.contractproposal', 'change'),
+
+        ('humanresources.contract', 'view'),
+
+        ('orders.order', 'add'),
+        ('orders.order', 'view'),
+        ('orders.order', 'change'),
+        ('orders.order', 'delete'),
+        ('orders.order', 'app_access_orders'),
+    ),
+    'manager': (
+        ('people.person', 'view'),
+        ('people.person', 'change'),
+        ('people.person', 'app_access_people'),
+
+        ('humanresources.contractproposal', 'add'),
+        ('humanresources.contractproposal', 'view'),
+        ('humanresources.contractproposal', 'change'),
+
+        ('humanresources.contract', 'view'),
+
+        ('orders.order', 'add'),
+        ('orders.order', 'view'),
+        ('orders.order', 'change'),
+        ('orders.order', 'delete'),
+        ('orders.order', 'app_access_orders'),
+    ),
+}
+
+
+def profile_codenames(profile):
+    """Return the (app label, model, codename) triplets of a profile."""
+    triplets = []
+    for model_label, codename in PROFILE_PERMISSIONS[profile]:
+        app_label, model_name = model_label.lower().split('.')
+        if codename in DEFAULT_CODENAMES:
+            codename = f'{codename}_{model_name}'
+        triplets.append((app_label, model_name, codename))
+    return triplets
+
+
+_default_permissions = None
+
+
+def get_default_permissions():
+    """Return a dict with the set of Permission objects of each profile.
+
+    All the profiles are resolved in a single query on the first call
+    and the result is kept for the next ones.
+    """
+    global _default_permissions
+
+    if _default_permissions is None:
+        triplets = {
+            profile: profile_codenames(profile) for profile in PROFILE_PERMISSIONS
+        }
+        unique = set().union(*triplets.values())
+
+        query = reduce(or_, (
+            Q(content_type__app_label=app_label,
+              content_type__model=model_name,
+              codename=codename)
+            for app_label, model_name, codename in unique
+        ))
+        permissions = {
+            (perm.content_type.app_label, perm.content_type.model, perm.codename): perm
+            for perm in Permission.objects.filter(query).select_related('content_type')
+        }
+
+        missing = unique - set(permissions)
+        if missing:
+            raise Permission.DoesNotExist(
+                'Permissions not found: ' + ', '.join(sorted('.'.join(t) for t in missing)))
+
+        _default_permissions = {
+            profile: {permissions[triplet] for triplet in profile_triplets}
+            for profile, profile_triplets in triplets.items()
+        }
+
+    return _default_permissions
+
+
+def reset_default_permissions(**kwargs):
+    global _default_permissions
+    _default_permissions = None
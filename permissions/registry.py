@@ -0,0 +1,75 @@
+from collections import namedtuple
+
+from django.apps import apps
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+
+
+DEFAULT_ACTIONS = ('view', 'add', 'change', 'delete')
+
+ManagedModel = namedtuple('ManagedModel', ['model', 'permissions', 'fieldset'])
+ManagedModel.__doc__ = """Permissions of a model managed in the permissions form.
+`fieldset` holds the codenames of the permissions organized in rows.
+"""
+
+
+def chunks(l, n):
+    n = max(1, n)
+    return [
+        tuple(l[i:i+n] + [' '] * (n-len(l[i:i+n])))
+        for i in range(0, len(l), n)
+    ]
+
+
+_registry = {}
+
+
+def _build_registry(model_names):
+    models = []
+    for model_name in model_names:
+        try:
+            models.append(apps.get_model(model_name))
+        except LookupError:
+            continue
+
+    content_types = ContentType.objects.get_for_models(*models)
+
+    by_content_type = {}
+    for perm in Permission.objects.filter(content_type__in=content_types.values()).order_by('name'):
+        by_content_type.setdefault(perm.content_type_id, []).append(perm)
+
+    registry = []
+    for model in models:
+        content_type = content_types[model]
+        permissions = by_content_type.get(content_type.pk, [])
+
+        # default model permissions first, followed by the custom ones
+        codenames = [f'{action}_{content_type.model}' for action in DEFAULT_ACTIONS]
+        by_codename = {perm.codename: perm for perm in permissions}
+        ordered = [by_codename[codename] for codename in codenames if codename in by_codename]
+        ordered += [perm for perm in permissions if perm.codename not in codenames]
+
+        registry.append(ManagedModel(
+            model=model,
+            permissions=tuple(ordered),
+            fieldset=tuple(chunks([perm.codename for perm in ordered], 4)),
+        ))
+
+    return tuple(registry)
+
+
+def get_managed_permissions(model_names):
+    """Return a `ManagedModel` for each installed model of `model_names`.
+
+    The catalogue is built once per process with a single query on the
+    permissions table, and discarded after the migrations run.
+    """
+    key = tuple(model_names)
+    registry = _registry.get(key)
+    if registry is None:
+        registry = _registry[key] = _build_registry(key)
+    return registry
+
+
+def reset_managed_permissions(**kwargs):
+    _registry.clear()
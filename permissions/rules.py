@@ -0,0 +1,172 @@
+import posixpath
+from collections import namedtuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+
+PUBLIC = 'public'
+PROTECTED = 'protected'
+DENIED = 'denied'
+
+ACCESS_TYPES = (PUBLIC, PROTECTED, DENIED)
+
+# Media roots public to every logged in user
+PUBLIC_MEDIA_PATHS = (
+    'cache',
+    'uploads/image',
+    'uploads/person/person_img',
+    'uploads/group/group_img',
+    'uploads/publication/publication_file',
+)
+
+# Protected file fields, (model label, field name, resolver). The root of
+# each field is read from its `upload_to`.
+PROTECTED_FILE_FIELDS = (
+    ('humanresources.contractfile', 'contractfile_file', 'permissions.authorization.contract_file'),
+    ('humanresources.privateinfo', 'privateinfo_cv', 'permissions.authorization.privateinfo_cv'),
+    ('people.person', 'person_cv', 'permissions.authorization.person_cv'),
+    ('orders.orderfile', 'file', 'permissions.authorization.order_file'),
+)
+
+# Resolver of the paths outside the protected roots
+FALLBACK_RESOLVER = 'permissions.authorization.any_document'
+
+
+def installed_file_fields():
+    """Return the (model field, field name, resolver) of `PROTECTED_FILE_FIELDS`
+    whose apps are installed.
+    """
+    fields = []
+    for label, field_name, resolver in PROTECTED_FILE_FIELDS:
+        try:
+            model = apps.get_model(label)
+        except LookupError:
+            continue
+        fields.append((model._meta.get_field(field_name), field_name, resolver))
+    return fields
+
+
+def _upload_root(field):
+    """Fixed root of the field `upload_to`, None if it is a callable."""
+    if callable(field.upload_to):
+        return None
+    return field.upload_to.split('%')[0].strip('/') or None
+
+
+def default_media_rules():
+    """Rules used when PERMISSIONS_MEDIA_RULES is not configured.
+
+    Each rule is a tuple (path root, access type[, resolver]). Protected rules
+    require a resolver, a callable or its dotted path, with the signature
+    `resolver(user, path)` returning True if the user may access the file.
+    The paths outside the protected roots are allowed to their owners and
+    to human resources.
+    """
+    rules = [(root, PUBLIC) for root in PUBLIC_MEDIA_PATHS]
+    for field, _, resolver in installed_file_fields():
+        root = _upload_root(field)
+        if root is not None:
+            rules.append((root, PROTECTED, resolver))
+    rules.append(('', PROTECTED, FALLBACK_RESOLVER))
+    return rules
+
+
+Rule = namedtuple('Rule', ['prefix', 'access', 'resolver'])
+
+DENY_RULE = Rule('', DENIED, None)
+
+
+def _segments(path):
+    return [segment for segment in path.split('/') if segment]
+
+
+def normalize_media_path(path):
+    """Resolve the `.` and `..` segments of `path`, so a path cannot match
+    the rule of a root it leaves. Returns None for the paths outside the
+    media root.
+    """
+    path = posixpath.normpath(path or '.')
+    if path == '..' or path.startswith('../') or path.startswith('/'):
+        return None
+    return '' if path == '.' else path
+
+
+class PathRules:
+    """Prefix trie of media rules indexed by path segments.
+
+    Matching walks the segments of the requested path once and returns
+    the rule with the longest matching root, so its cost depends on the
+    depth of the path and not on the number of rules.
+    """
+
+    def __init__(self, rules):
+        self._root = {}
+
+        for rule in rules:
+            rule = self.compile_rule(rule)
+            node = self._root
+            for segment in _segments(rule.prefix):
+                node = node.setdefault(segment, {})
+            node[None] = rule
+
+    @staticmethod
+    def compile_rule(rule):
+        prefix, access, resolver = (tuple(rule) + (None,))[:3]
+
+        if access not in ACCESS_TYPES:
+            raise ImproperlyConfigured(
+                f'Invalid access type "{access}" for the media path "{prefix}"')
+
+        if access == PROTECTED:
+            if resolver is None:
+                raise ImproperlyConfigured(
+                    f'The protected media path "{prefix}" has no resolver')
+            if isinstance(resolver, str):
+                resolver = import_string(resolver)
+
+        return Rule(prefix, access, resolver)
+
+    def match(self, path):
+        """Return the rule of the longest root matching `path`.
+        Paths not covered by any rule, or outside the media root, are denied.
+        """
+        path = normalize_media_path(path)
+        if path is None:
+            return DENY_RULE
+
+        rule = self._root.get(None, DENY_RULE)
+        node = self._root
+        for segment in _segments(path):
+            node = node.get(segment)
+            if node is None:
+                break
+            rule = node.get(None, rule)
+        return rule
+
+
+_media_rules = None
+
+
+def get_media_rules():
+    """Return the compiled media rules. They are compiled once per process."""
+    global _media_rules
+    if _media_rules is None:
+        rules = getattr(settings, 'PERMISSIONS_MEDIA_RULES', None)
+        if rules is None:
+            rules = default_media_rules()
+        _media_rules = PathRules(rules)
+    return _media_rules
+
+
+def reset_media_rules(**kwargs):
+    """Discard the compiled rules so they are rebuilt from the settings."""
+    global _media_rules
+    if kwargs.get('setting', 'PERMISSIONS_MEDIA_RULES') == 'PERMISSIONS_MEDIA_RULES':
+        _media_rules = None
+
+
+def match_media_rule(path):
+    return get_media_rules().match(path)
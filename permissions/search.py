@@ -0,0 +1,170 @@
+import uuid
+from bisect import bisect_left
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import Group as AuthGroup
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Case
+from django.db.models import IntegerField
+from django.db.models import When
+
+
+USERS_INDEX = 'users'
+AUTH_GROUPS_INDEX = 'auth_groups'
+
+SEARCH_VERSION_KEY = 'permissions:search:version:{}'
+
+SEARCH_LIMIT = 20
+
+# Matches of the index checked against the searched queryset in each query
+SEARCH_BATCH_SIZE = 500
+
+# Rank of the matches, lower is better
+EXACT, PREFIX, TOKEN = 0, 1, 2
+
+
+def _tokens(text):
+    return text.lower().replace('-', ' ').replace('_', ' ').replace('.', ' ').split()
+
+
+class PrefixIndex:
+    """Sorted list of (term, rank, pk) entries searched with bisect.
+
+    Each object is indexed by its whole name, ranked PREFIX, and by each
+    token of its names, ranked TOKEN. A search returns the objects matching
+    every token of the keyword, best ranked first.
+    """
+
+    def __init__(self, names):
+        entries = set()
+        for pk, name, other_names in names:
+            name = (name or '').lower()
+            if name:
+                entries.add((name, PREFIX, pk))
+            for text in (name,) + tuple(other_names):
+                for token in _tokens(text or ''):
+                    entries.add((token, TOKEN, pk))
+
+        self._entries = sorted(entries)
+        self._terms = [term for term, _, _ in self._entries]
+
+    def _match(self, prefix):
+        """Return the best rank of each object with a term starting with `prefix`."""
+        matches = {}
+        i = bisect_left(self._terms, prefix)
+        while i < len(self._terms) and self._terms[i].startswith(prefix):
+            term, rank, pk = self._entries[i]
+            if term == prefix and rank == PREFIX:
+                rank = EXACT
+            if rank < matches.get(pk, TOKEN + 1):
+                matches[pk] = rank
+            i += 1
+        return matches
+
+    def search(self, keyword, limit=SEARCH_LIMIT):
+        keyword = keyword.lower().strip()
+        if not keyword:
+            return []
+
+        # the whole keyword may be the prefix of a name
+        scores = self._match(keyword)
+
+        tokens = _tokens(keyword)
+        if not tokens:
+            # only separators, matched by the whole keyword alone
+            return sorted(scores, key=lambda pk: (scores[pk], pk))[:limit]
+
+        if len(tokens) > 1 or tokens != [keyword]:
+            matches = [self._match(token) for token in tokens]
+            common = set.intersection(*(set(match) for match in matches))
+            for pk in common:
+                rank = max(match[pk] for match in matches)
+                scores[pk] = min(scores.get(pk, rank), rank)
+
+        return sorted(scores, key=lambda pk: (scores[pk], pk))[:limit]
+
+
+def _users_names():
+    usernames, names = {}, {}
+    for pk, username, first_name, last_name in User.objects\
+            .values_list('pk', 'username', 'first_name', 'last_name'):
+        usernames[pk] = username
+        names[pk] = [first_name, last_name]
+
+    if apps.is_installed('people'):
+        Person = apps.get_model('people', 'Person')
+        for user_id, full_name in Person.objects\
+                .filter(auth_user__isnull=False)\
+                .values_list('auth_user_id', 'full_name'):
+            if user_id in names:
+                names[user_id].append(full_name)
+
+    return [(pk, usernames[pk], other) for pk, other in names.items()]
+
+
+def _auth_groups_names():
+    return [(pk, name, ()) for pk, name in AuthGroup.objects.values_list('pk', 'name')]
+
+
+INDEX_SOURCES = {
+    USERS_INDEX: _users_names,
+    AUTH_GROUPS_INDEX: _auth_groups_names,
+}
+
+_indexes = {}
+
+
+def get_index(kind):
+    """Return the index of `kind`, rebuilt when another process
+    or a signal bumped its version in the cache.
+    """
+    key = SEARCH_VERSION_KEY.format(kind)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key)
+
+    built_version, index = _indexes.get(kind, (None, None))
+    if built_version != version:
+        index = PrefixIndex(INDEX_SOURCES[kind]())
+        _indexes[kind] = (version, index)
+    return index
+
+
+def invalidate_search_index(kind):
+    cache.set(SEARCH_VERSION_KEY.format(kind), uuid.uuid4().hex, None)
+    _indexes.pop(kind, None)
+
+
+def search_queryset(queryset, kind, keyword, fallback, limit=SEARCH_LIMIT):
+    """Filter the queryset with the objects of the index matching the keyword,
+    best matches first. The matches are checked against the queryset filters
+    before the `limit` is applied, in batches of `SEARCH_BATCH_SIZE`. Uses
+    `fallback(queryset, keyword)` when the `PERMISSIONS_SEARCH_INDEX`
+    setting is False.
+    """
+    if not keyword:
+        return queryset
+
+    if not getattr(settings, 'PERMISSIONS_SEARCH_INDEX', True):
+        return fallback(queryset, keyword)
+
+    matches = get_index(kind).search(keyword, limit=None)
+
+    pks = []
+    for i in range(0, len(matches), SEARCH_BATCH_SIZE):
+        batch = matches[i:i + SEARCH_BATCH_SIZE]
+        allowed = set(queryset.filter(pk__in=batch).order_by().values_list('pk', flat=True))
+        pks += [pk for pk in batch if pk in allowed]
+        if len(pks) >= limit:
+            break
+    pks = pks[:limit]
+
+    ordering = Case(
+        *[When(pk=pk, then=position) for position, pk in enumerate(pks)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=pks).order_by(ordering) if pks else queryset.none()
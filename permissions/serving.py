@@ -0,0 +1,198 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import Http404
+from django.http import HttpResponse
+from django.http import StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.utils.http import parse_http_date_safe
+from django.views.static import serve
+
+
+SERVE = 'serve'
+X_ACCEL_REDIRECT = 'x-accel-redirect'
+X_SENDFILE = 'x-sendfile'
+
+
+def _file_response(path):
+    """Empty response carrying the headers of the file the server will send."""
+    response = HttpResponse()
+
+    content_type, encoding = mimetypes.guess_type(path)
+    response['Content-Type'] = content_type or 'application/octet-stream'
+    if encoding:
+        response['Content-Encoding'] = encoding
+
+    return response
+
+
+def x_accel_redirect(request, path, document_root):
+    """Delegate the file transfer to nginx.
+
+    `PERMISSIONS_MEDIA_INTERNAL_URL` must point to an `internal` location
+    of nginx aliased to the media root.
+    """
+    internal_url = getattr(settings, 'PERMISSIONS_MEDIA_INTERNAL_URL', None)
+    if not internal_url:
+        raise ImproperlyConfigured(
+            'PERMISSIONS_MEDIA_INTERNAL_URL is required by the x-accel-redirect media backend')
+
+    # refuse paths escaping the media root
+    safe_join(document_root or settings.MEDIA_ROOT, path)
+
+    response = _file_response(path)
+    url = posixpath.join(internal_url, posixpath.normpath(path).lstrip('/'))
+    response['X-Accel-Redirect'] = quote(url)
+    return response
+
+
+def x_sendfile(request, path, document_root):
+    """Delegate the file transfer to Apache (mod_xsendfile) or lighttpd."""
+    response = _file_response(path)
+    response['X-Sendfile'] = safe_join(document_root or settings.MEDIA_ROOT, path)
+    return response
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _parse_range(request, size, etag, last_modified):
+    """Return the (first, last) byte positions requested by a single `Range`
+    header, None to send the whole file, or False if it is not satisfiable.
+    Multiple ranges are not supported and the whole file is sent instead.
+    """
+    header = request.META.get('HTTP_RANGE')
+    if not header or request.method not in ('GET', 'HEAD'):
+        return None
+
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+        # the file changed since the client got the first part
+        return None
+
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if first and last and int(last) < int(first):
+        # invalid range, ignored as if absent (RFC 7233, 3.1)
+        return None
+
+    if not first:
+        # suffix range with the last N bytes
+        if int(last) == 0:
+            return False
+        first, last = max(size - int(last), 0), size - 1
+    else:
+        first = int(first)
+        last = min(int(last), size - 1) if last else size - 1
+
+    if first >= size:
+        return False
+
+    return first, last
+
+
+def _read_range(fullpath, first, last):
+    with open(fullpath, 'rb') as fd:
+        fd.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            data = fd.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+def conditional_serve(request, path, document_root):
+    """Serve the file with `ETag`/`Last-Modified` validation and single
+    `Range` requests. Whole files are sent by Django's `serve`.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    fullpath = safe_join(document_root or settings.MEDIA_ROOT, path)
+
+    try:
+        statobj = os.stat(fullpath)
+    except OSError:
+        raise Http404('"%(path)s" does not exist' % {'path': path})
+
+    last_modified = int(statobj.st_mtime)
+    etag = '"%x-%x"' % (int(statobj.st_mtime * 1000000), statobj.st_size)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    if response is None:
+        byte_range = _parse_range(request, statobj.st_size, etag, last_modified)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */%d' % statobj.st_size
+
+        elif byte_range is not None:
+            first, last = byte_range
+            response = StreamingHttpResponse(_read_range(fullpath, first, last), status=206)
+            content_type, encoding = mimetypes.guess_type(fullpath)
+            response['Content-Type'] = content_type or 'application/octet-stream'
+            if encoding:
+                response['Content-Encoding'] = encoding
+            response['Content-Range'] = 'bytes %d-%d/%d' % (first, last, statobj.st_size)
+            response['Content-Length'] = str(last - first + 1)
+
+        else:
+            response = serve(request, path, document_root or settings.MEDIA_ROOT)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _patch_media_cache(response, public):
+    """Let browsers and proxies keep public files for long periods, and
+    only the browser keep protected ones, revalidating on every use.
+    """
+    if public:
+        max_age = getattr(settings, 'PERMISSIONS_MEDIA_PUBLIC_MAX_AGE', 60 * 60 * 24 * 30)
+        patch_cache_control(response, public=True, max_age=max_age)
+    else:
+        max_age = getattr(settings, 'PERMISSIONS_MEDIA_PRIVATE_MAX_AGE', 0)
+        patch_cache_control(response, private=True, max_age=max_age, must_revalidate=True)
+
+
+MEDIA_BACKENDS = {
+    SERVE: conditional_serve,
+    X_ACCEL_REDIRECT: x_accel_redirect,
+    X_SENDFILE: x_sendfile,
+}
+
+
+def serve_media(request, path, document_root=None, public=False):
+    """Send an authorized media file using the backend selected in the
+    `PERMISSIONS_MEDIA_BACKEND` setting. Django's `serve`, extended with
+    conditional and range requests, is the default.
+    """
+    backend = getattr(settings, 'PERMISSIONS_MEDIA_BACKEND', SERVE)
+
+    try:
+        backend = MEDIA_BACKENDS[backend]
+    except KeyError:
+        raise ImproperlyConfigured(f'Unknown media backend "{backend}"')
+
+    response = backend(request, path, document_root)
+    _patch_media_cache(response, public)
+    return response
@@ -0,0 +1,468 @@
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import Group as AuthGroup
+from django.contrib.auth.models import Permission as AuthPermission
+from django.contrib.auth.models import User
+from django.core.signals import setting_changed
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_init
+from django.db.models.signals import post_migrate
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_delete
+from django.db.models.signals import pre_save
+
+from .backends import AUTH_ATTR
+from .backends import auth_cache_enabled
+from .backends import invalidate_auth_catalogue
+from .backends import invalidate_auth_groups
+from .backends import invalidate_user_auth
+from .documents import invalidate_user_documents
+from .instrumentation import reset_instrumentation
+from .models import DirtyResearchGroup
+from .models import EffectivePermission
+from .models import Permission as RankedPermission
+from .models.effective_permission import effective_permissions_enabled
+from .models.permissions_summary import invalidate_summary
+from .models.permissions_summary import invalidate_summary_catalogue
+from .profiles import reset_default_permissions
+from .registry import reset_managed_permissions
+from .rules import reset_media_rules
+from .search import AUTH_GROUPS_INDEX
+from .search import USERS_INDEX
+from .search import invalidate_search_index
+
+
+def _get_model(label):
+    """Return the model for `label` or None if its app is not installed."""
+    try:
+        return apps.get_model(label)
+    except LookupError:
+        return None
+
+
+def _documents_groups():
+    """Names of the auth groups that change the documents a user can access."""
+    return (settings.PROFILE_HUMAN_RESOURCES, settings.APP_PROFILE_ALL_ORDERS)
+
+
+###############################################################################
+# Users documents index
+###############################################################################
+
+def _person_user(person):
+    return person.auth_user_id if person is not None else None
+
+
+def _contract_owners(contract):
+    if contract is None:
+        return []
+    return [_person_user(contract.person), _person_user(contract.supervisor)]
+
+
+def _documents_owners(instance):
+    """Return the ids of the users whose documents index depends on `instance`."""
+    model_name = instance._meta.label_lower
+
+    if model_name == 'humanresources.contractfile':
+        return _contract_owners(instance.contract)
+
+    elif model_name == 'humanresources.contract':
+        return _contract_owners(instance)
+
+    elif model_name == 'humanresources.privateinfo':
+        return [_person_user(instance.person)]
+
+    elif model_name == 'people.person':
+        return [instance.auth_user_id]
+
+    elif model_name == 'orders.orderfile':
+        all_orders = User.objects.filter(
+            groups__name=settings.APP_PROFILE_ALL_ORDERS
+        ).values_list('pk', flat=True)
+        return [instance.createdby_id] + list(all_orders)
+
+    return []
+
+
+def documents_owner_pre_save(sender, instance, raw=False, **kwargs):
+    """Invalidate the owners the instance had before being changed."""
+    if raw or instance.pk is None:
+        return
+    old = sender._default_manager.filter(pk=instance.pk).first()
+    if old is not None:
+        invalidate_user_documents(_documents_owners(old))
+
+
+def documents_owner_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_user_documents(_documents_owners(instance))
+
+
+def documents_group_renaming(sender, instance, raw=False, **kwargs):
+    # keep the name the group is renamed from
+    if not raw and instance.pk is not None:
+        instance._documents_old_name = sender._default_manager\
+            .filter(pk=instance.pk).values_list('name', flat=True).first()
+
+
+def documents_group_changed(sender, instance, raw=False, **kwargs):
+    """Invalidate the members of a profile group, or of a group renamed from one."""
+    names = {instance.name, instance.__dict__.pop('_documents_old_name', None)}
+    if not raw and names.intersection(_documents_groups()):
+        invalidate_user_documents(instance.user_set.values_list('pk', flat=True))
+
+
+def documents_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidate the users added to or removed from the profile groups."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    names = _documents_groups()
+
+    if reverse:
+        # instance is an auth group and pk_set contains users
+        if instance.name not in names:
+            return
+        if action == 'pre_clear':
+            pk_set = instance.user_set.values_list('pk', flat=True)
+        invalidate_user_documents(pk_set)
+
+    else:
+        # instance is a user and pk_set contains auth groups
+        if action == 'pre_clear':
+            groups = instance.groups.all()
+        else:
+            groups = AuthGroup.objects.filter(pk__in=pk_set)
+        if groups.filter(name__in=names).exists():
+            invalidate_user_documents([instance.pk])
+
+
+###############################################################################
+# Permissions list summary
+###############################################################################
+
+def summary_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Bump the summary version of the auth groups whose permissions changed."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if not reverse:
+        # instance is an auth group
+        invalidate_summary([instance.pk])
+    elif action == 'pre_clear':
+        # instance is a permission removed from all its groups
+        invalidate_summary(instance.group_set.values_list('pk', flat=True))
+    else:
+        invalidate_summary(pk_set)
+
+
+def summary_catalogue_changed(sender, **kwargs):
+    if not kwargs.get('raw', False):
+        invalidate_summary_catalogue()
+
+
+###############################################################################
+# Research groups profiles synchronization
+###############################################################################
+
+RESEARCH_GROUP_SYNC_FIELDS = ('group_name', 'grouptype_id', 'person_id')
+
+
+def _research_group_state(instance):
+    """Loaded fields of a research group used to synchronize its profiles.
+    They are read from the instance dict, reading a deferred field would
+    load it and send post_init again.
+    """
+    deferred = instance.get_deferred_fields()
+    return {
+        name: instance.__dict__[name]
+        for name in RESEARCH_GROUP_SYNC_FIELDS if name not in deferred
+    }
+
+
+def research_group_loaded(sender, instance, **kwargs):
+    instance._profiles_sync_state = _research_group_state(instance)
+
+
+def research_group_changed(sender, instance, created, raw=False, **kwargs):
+    """Mark the research group to be synchronized by `sync_permissions --changed-only`."""
+    if raw:
+        return
+
+    # the fields deferred when loaded are compared as changed once set
+    loaded = getattr(instance, '_profiles_sync_state', None)
+    state = _research_group_state(instance)
+    if created or loaded is None or any(
+            name not in loaded or loaded[name] != value for name, value in state.items()):
+        DirtyResearchGroup.objects.mark([instance.pk])
+    instance._profiles_sync_state = state
+
+
+###############################################################################
+# Autocomplete search indexes
+###############################################################################
+
+def search_users_changed(sender, update_fields=None, raw=False, **kwargs):
+    # logins only update the last_login field, which is not indexed
+    if raw or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    invalidate_search_index(USERS_INDEX)
+
+
+def search_auth_groups_changed(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate_search_index(AUTH_GROUPS_INDEX)
+
+
+###############################################################################
+# Effective permissions table
+###############################################################################
+
+def _auth_groups_users(auth_group_ids):
+    return User.groups.through.objects\
+        .filter(group_id__in=auth_group_ids)\
+        .values_list('user_id', flat=True)
+
+
+def effective_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Update the users added to or removed from auth groups."""
+    if not effective_permissions_enabled():
+        return
+
+    if action == 'pre_clear' and reverse:
+        # instance is an auth group, its members are unknown after the clear
+        instance._effective_cleared = list(_auth_groups_users([instance.pk]))
+    elif action in ('post_add', 'post_remove'):
+        EffectivePermission.objects.sync_users(pk_set if reverse else [instance.pk])
+    elif action == 'post_clear':
+        if reverse:
+            EffectivePermission.objects.sync_users(instance.__dict__.pop('_effective_cleared', []))
+        else:
+            EffectivePermission.objects.sync_users([instance.pk])
+
+
+def effective_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Update the members of the auth groups whose permissions changed."""
+    if not effective_permissions_enabled():
+        return
+
+    if action == 'pre_clear' and reverse:
+        # instance is a permission, its groups are unknown after the clear
+        instance._effective_cleared = list(instance.group_set.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        auth_group_ids = pk_set if reverse else [instance.pk]
+        EffectivePermission.objects.sync_users(_auth_groups_users(auth_group_ids))
+    elif action == 'post_clear':
+        if reverse:
+            auth_group_ids = instance.__dict__.pop('_effective_cleared', [])
+        else:
+            auth_group_ids = [instance.pk]
+        EffectivePermission.objects.sync_users(_auth_groups_users(auth_group_ids))
+
+
+def effective_ranking_loaded(sender, instance, **kwargs):
+    # keep the auth group loaded, its members are updated if it is replaced;
+    # read from the instance dict, a deferred auth group would be loaded
+    if 'auth_group_id' in instance.__dict__:
+        instance._effective_auth_group_id = instance.__dict__['auth_group_id']
+
+
+def effective_ranking_saving(sender, instance, raw=False, **kwargs):
+    """Read the auth group of a ranking loaded with the auth group deferred."""
+    if raw or instance.pk is None or not effective_permissions_enabled():
+        return
+    if '_effective_auth_group_id' not in instance.__dict__:
+        instance._effective_auth_group_id = sender._default_manager\
+            .filter(pk=instance.pk).values_list('auth_group_id', flat=True).first()
+
+
+def effective_ranking_changed(sender, instance, raw=False, **kwargs):
+    if raw or not effective_permissions_enabled():
+        return
+
+    auth_group_ids = {instance.auth_group_id, instance.__dict__.get('_effective_auth_group_id')} - {None}
+    EffectivePermission.objects.sync_users(_auth_groups_users(auth_group_ids))
+    instance._effective_auth_group_id = instance.auth_group_id
+
+
+def effective_ranking_deleting(sender, instance, **kwargs):
+    # the auth group members may be deleted in the same cascade
+    if effective_permissions_enabled():
+        instance._effective_users = list(_auth_groups_users([instance.auth_group_id]))
+
+
+def effective_ranking_deleted(sender, instance, **kwargs):
+    if effective_permissions_enabled():
+        EffectivePermission.objects.sync_users(instance.__dict__.pop('_effective_users', []))
+
+
+def effective_catalogue_changed(sender, instance, signal, created=False, raw=False, **kwargs):
+    """Update the rows of a permission renamed or deleted."""
+    if raw or created or not effective_permissions_enabled():
+        return
+
+    if signal is post_delete:
+        EffectivePermission.objects.filter(
+            content_type_id=instance.content_type_id,
+            codename=instance.codename,
+        ).delete()
+    else:
+        auth_group_ids = instance.group_set.values_list('pk', flat=True)
+        EffectivePermission.objects.sync_users(_auth_groups_users(auth_group_ids))
+
+
+###############################################################################
+# Cached auth groups and permissions of the users
+###############################################################################
+
+def _forget_user_auth(user):
+    # the entry kept on the instance for the request
+    user.__dict__.pop(AUTH_ATTR, None)
+
+
+def auth_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidate the users added to or removed from auth groups,
+    and the users granted or revoked permissions.
+    """
+    if reverse:
+        # instance is an auth group or a permission and pk_set contains users
+        if action == 'pre_clear':
+            # its users are unknown after the clear
+            instance._auth_cleared_users = list(instance.user_set.values_list('pk', flat=True))
+        elif action in ('post_add', 'post_remove'):
+            invalidate_user_auth(pk_set)
+        elif action == 'post_clear':
+            invalidate_user_auth(instance.__dict__.pop('_auth_cleared_users', []))
+
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        # instance is a user
+        _forget_user_auth(instance)
+        invalidate_user_auth([instance.pk])
+
+
+def auth_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidate the members of the auth groups whose permissions changed."""
+    if action == 'pre_clear' and reverse:
+        # instance is a permission, its groups are unknown after the clear
+        instance._auth_cleared_groups = list(instance.group_set.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        invalidate_auth_groups(pk_set if reverse else [instance.pk])
+    elif action == 'post_clear':
+        if reverse:
+            invalidate_auth_groups(instance.__dict__.pop('_auth_cleared_groups', []))
+        else:
+            invalidate_auth_groups([instance.pk])
+
+
+def auth_group_changed(sender, instance, created=False, raw=False, **kwargs):
+    """Invalidate the members of a renamed auth group."""
+    if not raw and not created:
+        invalidate_auth_groups([instance.pk])
+
+
+def auth_group_deleting(sender, instance, **kwargs):
+    # the members are removed in the same cascade
+    instance._auth_users = list(_auth_groups_users([instance.pk]))
+
+
+def auth_group_deleted(sender, instance, **kwargs):
+    invalidate_user_auth(instance.__dict__.pop('_auth_users', []))
+
+
+def auth_catalogue_changed(sender, **kwargs):
+    if not kwargs.get('raw', False) and not kwargs.get('created', False):
+        invalidate_auth_catalogue()
+
+
+def connect_auth_cache(**kwargs):
+    """Connect the receivers of the cached auth entries when CachedModelBackend
+    is configured, and disconnect them otherwise.
+    """
+    if kwargs.get('setting', 'AUTHENTICATION_BACKENDS') != 'AUTHENTICATION_BACKENDS':
+        return
+
+    receivers = (
+        (m2m_changed, auth_membership_changed, User.groups.through),
+        (m2m_changed, auth_membership_changed, User.user_permissions.through),
+        (m2m_changed, auth_permissions_changed, AuthGroup.permissions.through),
+        (post_save, auth_group_changed, AuthGroup),
+        (pre_delete, auth_group_deleting, AuthGroup),
+        (post_delete, auth_group_deleted, AuthGroup),
+        (post_save, auth_catalogue_changed, AuthPermission),
+        (post_delete, auth_catalogue_changed, AuthPermission),
+        (post_migrate, auth_catalogue_changed, None),
+    )
+    enabled = auth_cache_enabled()
+    for signal, receiver, sender in receivers:
+        if enabled:
+            signal.connect(receiver, sender=sender)
+        else:
+            signal.disconnect(receiver, sender=sender)
+
+    if enabled and 'setting' in kwargs:
+        # the entries were not invalidated while the backend was disabled
+        invalidate_auth_catalogue()
+
+
+DOCUMENTS_MODELS = (
+    'humanresources.contractfile',
+    'humanresources.contract',
+    'humanresources.privateinfo',
+    'people.person',
+    'orders.orderfile',
+)
+
+
+def connect():
+    """Connect the package receivers. Called from the app config."""
+
+    for label in DOCUMENTS_MODELS:
+        model = _get_model(label)
+        if model is None:
+            continue
+        pre_save.connect(documents_owner_pre_save, sender=model)
+        post_save.connect(documents_owner_changed, sender=model)
+        post_delete.connect(documents_owner_changed, sender=model)
+
+    research_group = _get_model('people.group')
+    if research_group is not None:
+        post_init.connect(research_group_loaded, sender=research_group)
+        post_save.connect(research_group_changed, sender=research_group)
+
+    pre_save.connect(documents_group_renaming, sender=AuthGroup)
+    post_save.connect(documents_group_changed, sender=AuthGroup)
+    m2m_changed.connect(documents_membership_changed, sender=User.groups.through)
+
+    m2m_changed.connect(summary_permissions_changed, sender=AuthGroup.permissions.through)
+    post_save.connect(summary_catalogue_changed, sender=AuthPermission)
+    post_delete.connect(summary_catalogue_changed, sender=AuthPermission)
+    post_migrate.connect(summary_catalogue_changed)
+
+    m2m_changed.connect(effective_membership_changed, sender=User.groups.through)
+    m2m_changed.connect(effective_permissions_changed, sender=AuthGroup.permissions.through)
+    post_init.connect(effective_ranking_loaded, sender=RankedPermission)
+    pre_save.connect(effective_ranking_saving, sender=RankedPermission)
+    post_save.connect(effective_ranking_changed, sender=RankedPermission)
+    pre_delete.connect(effective_ranking_deleting, sender=RankedPermission)
+    post_delete.connect(effective_ranking_deleted, sender=RankedPermission)
+    post_save.connect(effective_catalogue_changed, sender=AuthPermission)
+    post_delete.connect(effective_catalogue_changed, sender=AuthPermission)
+
+    connect_auth_cache()
+
+    post_save.connect(reset_managed_permissions, sender=AuthPermission)
+    post_delete.connect(reset_managed_permissions, sender=AuthPermission)
+    post_migrate.connect(reset_managed_permissions)
+    post_migrate.connect(reset_default_permissions)
+
+    for model in (User, _get_model('people.person')):
+        if model is not None:
+            post_save.connect(search_users_changed, sender=model)
+            post_delete.connect(search_users_changed, sender=model)
+    post_save.connect(search_auth_groups_changed, sender=AuthGroup)
+    post_delete.connect(search_auth_groups_changed, sender=AuthGroup)
+
+    setting_changed.connect(reset_media_rules)
+    setting_changed.connect(reset_instrumentation)
+    setting_changed.connect(connect_auth_cache)
@@ -0,0 +1,227 @@
+"""
+Columnar snapshots of the user x model access matrix.
+
+A snapshot is a directory with:
+
+    meta.json            models, number of users and the integer format
+    users.bin            sorted user ids
+    counts.bin           accessible objects per user and model, row-major
+    <model>.offsets.bin  optional, start of each user's ids in <model>.ids.bin
+    <model>.ids.bin      optional, sorted ids of the accessible objects
+
+The .bin files are arrays of native 64-bit integers, memory-mapped when read.
+"""
+import json
+import mmap
+import os
+import sys
+from array import array
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .pool import process_pool
+
+
+SNAPSHOT_VERSION = 1
+
+SNAPSHOT_MODELS = (
+    'humanresources.contract',
+    'humanresources.contractproposal',
+    'people.person',
+    'orders.order',
+)
+
+SNAPSHOT_CHUNK_SIZE = 200
+
+TYPECODE = 'q'
+
+
+def _matrix_chunk(args):
+    """Return the counts, and optionally the ids, of a chunk of users."""
+    user_ids, model_names, with_ids = args
+    models = [apps.get_model(name) for name in model_names]
+    users = User.objects.in_bulk(user_ids)
+
+    counts, ids = [], []
+    for user_id in user_ids:
+        user = users[user_id]
+        user_counts, user_ids_by_model = [], []
+        for model in models:
+            queryset = model.objects.list_permissions(user).order_by()
+            if with_ids:
+                object_ids = sorted(set(queryset.values_list('pk', flat=True).iterator()))
+                user_counts.append(len(object_ids))
+                user_ids_by_model.append(object_ids)
+            else:
+                user_counts.append(queryset.count())
+        counts.append(user_counts)
+        ids.append(user_ids_by_model)
+    return counts, ids
+
+
+def _write_array(path, values):
+    with open(path, 'wb') as fd:
+        array(TYPECODE, values).tofile(fd)
+
+
+def _installed(model_names):
+    """Return the models whose app is installed, by app label."""
+    installed = []
+    for name in model_names:
+        try:
+            apps.get_app_config(name.split('.')[0])
+        except LookupError:
+            continue
+        installed.append(name)
+    return installed
+
+
+def write_snapshot(path, model_names=SNAPSHOT_MODELS, with_ids=False,
+                   chunk_size=SNAPSHOT_CHUNK_SIZE, workers=1):
+    """Compute the access matrix of all the users and write it to `path`.
+    The users are processed in chunks, spread over `workers` processes.
+    """
+    model_names = _installed(model_names)
+
+    user_ids = sorted(User.objects.values_list('pk', flat=True))
+    chunks = [
+        (user_ids[i:i + chunk_size], model_names, with_ids)
+        for i in range(0, len(user_ids), chunk_size)
+    ]
+
+    if workers > 1:
+        with process_pool(workers) as executor:
+            results = list(executor.map(_matrix_chunk, chunks))
+    else:
+        results = [_matrix_chunk(chunk) for chunk in chunks]
+
+    os.makedirs(path, exist_ok=True)
+
+    counts = array(TYPECODE)
+    for chunk_counts, _ in results:
+        for user_counts in chunk_counts:
+            counts.extend(user_counts)
+
+    _write_array(os.path.join(path, 'users.bin'), user_ids)
+    _write_array(os.path.join(path, 'counts.bin'), counts)
+
+    if with_ids:
+        for index, model_name in enumerate(model_names):
+            offsets, ids = array(TYPECODE, [0]), array(TYPECODE)
+            for _, chunk_ids in results:
+                for user_ids_by_model in chunk_ids:
+                    ids.extend(user_ids_by_model[index])
+                    offsets.append(len(ids))
+            _write_array(os.path.join(path, f'{model_name}.offsets.bin'), offsets)
+            _write_array(os.path.join(path, f'{model_name}.ids.bin'), ids)
+
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'created': timezone.now().isoformat(),
+        'models': model_names,
+        'users': len(user_ids),
+        'with_ids': with_ids,
+        'typecode': TYPECODE,
+        'byteorder': sys.byteorder,
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as fd:
+        json.dump(meta, fd, indent=2)
+
+    return meta
+
+
+class Snapshot:
+    """Read only view of a snapshot, backed by memory-mapped files."""
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(os.path.join(path, 'meta.json')) as fd:
+            self.meta = json.load(fd)
+
+        if self.meta['byteorder'] != sys.byteorder or self.meta['typecode'] != TYPECODE:
+            raise ValueError(f'The snapshot {path} was written in an incompatible format')
+
+        self.models = self.meta['models']
+        self.with_ids = self.meta['with_ids']
+
+        self._maps = []
+        self._views = []
+        self._ids = {}
+
+        self.users = self._map('users.bin')
+        self.counts = self._map('counts.bin')
+
+        # row of each user in the matrix
+        self.index = {user_id: row for row, user_id in enumerate(self.users)}
+
+    def _map(self, filename):
+        with open(os.path.join(self.path, filename), 'rb') as fd:
+            if os.fstat(fd.fileno()).st_size == 0:
+                return memoryview(array(TYPECODE))
+            mapped = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped).cast(TYPECODE)
+        self._maps.append(mapped)
+        self._views.append(view)
+        return view
+
+    def count(self, row, model_name):
+        """Number of objects of the model accessible by the user in `row`."""
+        if row is None:
+            return 0
+        return self.counts[row * len(self.models) + self.models.index(model_name)]
+
+    def ids(self, row, model_name):
+        """Set of ids of the model accessible by the user in `row`."""
+        if row is None:
+            return set()
+
+        if model_name not in self._ids:
+            self._ids[model_name] = (
+                self._map(f'{model_name}.offsets.bin'),
+                self._map(f'{model_name}.ids.bin'),
+            )
+        offsets, ids = self._ids[model_name]
+        return set(ids[offsets[row]:offsets[row + 1]])
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+
+
+def diff_snapshots(before, after):
+    """Generate a dict for each (user, model) whose access changed between
+    two snapshots, with the counts and, when both snapshots include them,
+    the ids gained and lost.
+    """
+    models = [name for name in after.models if name in before.models]
+    with_ids = before.with_ids and after.with_ids
+
+    for user_id in sorted(set(before.index) | set(after.index)):
+        before_row = before.index.get(user_id)
+        after_row = after.index.get(user_id)
+
+        for name in models:
+            change = {
+                'user_id': user_id,
+                'model': name,
+                'before': before.count(before_row, name),
+                'after': after.count(after_row, name),
+            }
+
+            if with_ids:
+                ids_before = before.ids(before_row, name)
+                ids_after = after.ids(after_row, name)
+                if ids_before == ids_after:
+                    continue
+                change['gained'] = sorted(ids_after - ids_before)
+                change['lost'] = sorted(ids_before - ids_after)
+
+            elif change['before'] == change['after']:
+                continue
+
+            yield change
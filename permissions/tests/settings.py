@@ -0,0 +1,58 @@
+"""
+Settings of the tests: the permissions app with the stub `people`,
+`humanresources`, `orders` and `research` apps of the benchmarks on SQLite.
+
+    python -m django test permissions.tests --settings=permissions.tests.settings
+"""
+import os
+import sys
+import tempfile
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks', 'stubs'))
+
+SECRET_KEY = 'permissions-tests'
+
+USE_TZ = True
+
+INSTALLED_APPS = [
+    'django.contrib.contenttypes',
+    'django.contrib.auth',
+    'people',
+    'humanresources',
+    'orders',
+    'research',
+    'permissions.config.PermissionsConfig',
+]
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# The stub apps have no migrations, see benchmarks/settings.py
+MIGRATION_MODULES = {
+    'people': None,
+    'humanresources': None,
+    'orders': None,
+    'research': None,
+    'permissions': None,
+}
+
+ROOT_URLCONF = 'permissions.urls'
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = tempfile.mkdtemp(prefix='permissions-tests-')
+
+PROFILE_HUMAN_RESOURCES = 'PROFILE: Human Resources'
+APP_PROFILE_ALL_ORDERS = 'PROFILE: All Orders'
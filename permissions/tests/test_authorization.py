@@ -0,0 +1,174 @@
+import os
+import shutil
+import tempfile
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth.models import Group as AuthGroup
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.test import RequestFactory
+from django.test import TestCase
+from django.test import override_settings
+
+from humanresources.models import Contract
+from humanresources.models import ContractFile
+from humanresources.models import PrivateInfo
+from orders.models import Order
+from orders.models import OrderFile
+from people.models import Person
+
+from permissions import authorization
+from permissions.instrumentation import get_snapshot
+from permissions.views import media_access
+
+
+CONTRACT_FILE = 'uploads/contractfile/contractfile_file/contract.pdf'
+PRIVATE_CV = 'uploads/privateinfo/privateinfo_cv/private.pdf'
+PERSON_CV = 'uploads/person/person_cv/person.pdf'
+ORDER_FILE = 'uploads/orderfile/file/order.pdf'
+OTHER_FILE = 'uploads/other/other.pdf'
+PUBLIC_FILE = 'uploads/image/image.png'
+
+
+class AuthorizationTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='owner')
+        cls.supervisor = User.objects.create(username='supervisor')
+        cls.hr = User.objects.create(username='hr')
+        cls.all_orders = User.objects.create(username='all orders')
+        cls.other = User.objects.create(username='other')
+        cls.admin = User.objects.create(username='admin', is_superuser=True)
+
+        cls.hr.groups.add(AuthGroup.objects.create(name=settings.PROFILE_HUMAN_RESOURCES))
+        cls.all_orders.groups.add(AuthGroup.objects.create(name=settings.APP_PROFILE_ALL_ORDERS))
+
+        person = Person.objects.create(full_name='Owner', auth_user=cls.owner, person_cv=PERSON_CV)
+        supervisor = Person.objects.create(full_name='Supervisor', auth_user=cls.supervisor)
+        contract = Contract.objects.create(ref='C1', start=date(2020, 1, 1), person=person, supervisor=supervisor)
+        ContractFile.objects.create(contract=contract, contractfile_file=CONTRACT_FILE)
+        PrivateInfo.objects.create(person=person, privateinfo_cv=PRIVATE_CV)
+        order = Order.objects.create(order_desc='Order')
+        OrderFile.objects.create(order=order, file=ORDER_FILE, createdby=cls.owner)
+
+    def setUp(self):
+        cache.clear()
+
+
+class ResolversTests(AuthorizationTestCase):
+
+    def assertAllowed(self, resolver, path, allowed, denied):
+        for user in allowed:
+            with self.subTest(resolver=resolver.__name__, user=user.username):
+                self.assertTrue(resolver(user, path))
+        for user in denied:
+            with self.subTest(resolver=resolver.__name__, user=user.username):
+                self.assertFalse(resolver(user, path))
+
+    def test_contract_file(self):
+        self.assertAllowed(
+            authorization.contract_file, CONTRACT_FILE,
+            [self.owner, self.supervisor, self.hr], [self.all_orders, self.other])
+
+    def test_privateinfo_cv(self):
+        self.assertAllowed(
+            authorization.privateinfo_cv, PRIVATE_CV,
+            [self.owner, self.hr], [self.supervisor, self.other])
+
+    def test_person_cv(self):
+        self.assertAllowed(
+            authorization.person_cv, PERSON_CV,
+            [self.owner, self.hr], [self.supervisor, self.other])
+
+    def test_order_file(self):
+        self.assertAllowed(
+            authorization.order_file, ORDER_FILE,
+            [self.owner, self.hr, self.all_orders], [self.supervisor, self.other])
+
+    def test_other_path(self):
+        for resolver in (authorization.contract_file, authorization.order_file):
+            self.assertAllowed(resolver, OTHER_FILE, [], [self.owner])
+
+    def test_any_document(self):
+        self.assertAllowed(authorization.any_document, CONTRACT_FILE, [self.owner, self.hr], [self.other])
+        self.assertAllowed(authorization.any_document, ORDER_FILE, [self.owner, self.hr], [self.other])
+        self.assertAllowed(authorization.any_document, OTHER_FILE, [self.hr], [self.owner])
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            authorization.contract_file(self.other, CONTRACT_FILE)
+
+
+class MediaAccessTests(AuthorizationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        for path in (CONTRACT_FILE, ORDER_FILE, OTHER_FILE, PUBLIC_FILE):
+            os.makedirs(os.path.join(self.media_root, os.path.dirname(path)), exist_ok=True)
+            with open(os.path.join(self.media_root, path), 'wb') as fd:
+                fd.write(path.encode())
+
+    def get(self, user, path):
+        request = RequestFactory().get(settings.MEDIA_URL + path)
+        request.user = user
+        response = media_access(request, path, document_root=self.media_root)
+        self.addCleanup(response.close)
+        return response
+
+    def content(self, response):
+        return b''.join(response.streaming_content)
+
+    def assertDenied(self, user, path):
+        with self.assertRaises(PermissionDenied):
+            self.get(user, path)
+
+    def test_owner(self):
+        response = self.get(self.owner, CONTRACT_FILE)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), CONTRACT_FILE.encode())
+
+        # the grant is kept in the documents index
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(self.owner, CONTRACT_FILE).status_code, 200)
+
+    def test_other_users(self):
+        self.assertDenied(self.other, CONTRACT_FILE)
+        self.assertDenied(self.other, ORDER_FILE)
+        self.assertEqual(self.get(self.all_orders, ORDER_FILE).status_code, 200)
+
+    def test_outside_the_protected_roots(self):
+        self.assertDenied(self.owner, OTHER_FILE)
+        self.assertEqual(self.get(self.hr, OTHER_FILE).status_code, 200)
+
+    def test_public(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(self.other, PUBLIC_FILE).status_code, 200)
+
+    def test_superuser(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(self.admin, CONTRACT_FILE).status_code, 200)
+
+    def test_missing_file(self):
+        # denied before any query, like the files of other users
+        for path in ('uploads/contractfile/contractfile_file/missing.pdf', 'uploads/unknown/missing.pdf'):
+            with self.subTest(path=path), self.assertNumQueries(0):
+                self.assertDenied(self.hr, path)
+
+    def test_traversal(self):
+        self.assertDenied(self.other, 'uploads/image/../contractfile/contractfile_file/contract.pdf')
+        self.assertDenied(self.admin, '../' + os.path.basename(self.media_root) + '/' + PUBLIC_FILE)
+
+    @override_settings(PERMISSIONS_INSTRUMENTATION=True)
+    def test_instrumented(self):
+        self.get(self.owner, CONTRACT_FILE)
+
+        operations = get_snapshot()['operations']
+        for name in ('media_access', 'media_authorize', 'media_resolver.contract_file'):
+            self.assertEqual(sum(operations[name]['time_ms']['buckets']), 1)
+        self.assertEqual(operations['media_resolver.contract_file']['queries']['sum'], 1)
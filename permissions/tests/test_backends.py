@@ -0,0 +1,128 @@
+from django.contrib.auth.models import Group as AuthGroup
+from django.contrib.auth.models import Permission as AuthPermission
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db import transaction
+from django.db.models.signals import m2m_changed
+from django.test import TransactionTestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from permissions.backends import AUTH_VERSION_KEY
+from permissions.backends import CachedModelBackend
+
+
+def connected():
+    # the user permissions are only listened to by the auth cache receivers
+    return m2m_changed.has_listeners(User.user_permissions.through)
+
+
+@override_settings(AUTHENTICATION_BACKENDS=['permissions.backends.CachedModelBackend'])
+class CachedModelBackendTests(TransactionTestCase):
+    # the invalidations of the auth groups run on commit
+
+    def setUp(self):
+        cache.clear()
+        self.backend = CachedModelBackend()
+        self.user = User.objects.create(username='user')
+        self.group = AuthGroup.objects.create(name='group')
+        self.user.groups.add(self.group)
+        self.view = AuthPermission.objects.get(codename='view_contract')
+        self.change = AuthPermission.objects.get(codename='change_contract')
+        self.group.permissions.add(self.view)
+
+    def has_perm(self, perm):
+        # a new instance, as loaded by each request
+        return self.backend.has_perm(User.objects.get(pk=self.user.pk), perm)
+
+    def test_cached(self):
+        self.assertTrue(self.has_perm('humanresources.view_contract'))
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(self.backend.has_perm(user, 'humanresources.view_contract'))
+            self.assertFalse(self.backend.has_perm(user, 'humanresources.change_contract'))
+
+    def test_group_permissions_changed(self):
+        self.assertFalse(self.has_perm('humanresources.change_contract'))
+
+        self.group.permissions.add(self.change)
+        self.assertTrue(self.has_perm('humanresources.change_contract'))
+
+        self.change.group_set.clear()
+        self.assertFalse(self.has_perm('humanresources.change_contract'))
+
+    def test_groups_resolved_once_per_transaction(self):
+        self.assertTrue(self.has_perm('humanresources.view_contract'))
+        other = AuthGroup.objects.create(name='other')
+
+        with CaptureQueriesContext(connection) as context:
+            with transaction.atomic():
+                self.group.permissions.add(self.change)
+                other.permissions.add(self.change)
+        self.assertTrue(self.has_perm('humanresources.change_contract'))
+
+        # the members of both groups
+        members = [query for query in context.captured_queries if 'auth_user_groups' in query['sql']]
+        self.assertEqual(len(members), 1)
+
+    def test_membership_changed(self):
+        self.assertTrue(self.has_perm('humanresources.view_contract'))
+
+        self.user.groups.remove(self.group)
+        self.assertFalse(self.has_perm('humanresources.view_contract'))
+
+        self.group.user_set.add(self.user)
+        self.assertTrue(self.has_perm('humanresources.view_contract'))
+
+        self.group.user_set.clear()
+        self.assertFalse(self.has_perm('humanresources.view_contract'))
+
+    def test_membership_invalidated_on_commit(self):
+        self.assertTrue(self.has_perm('humanresources.view_contract'))
+        version = cache.get(AUTH_VERSION_KEY.format(self.user.pk))
+
+        with transaction.atomic():
+            self.user.groups.remove(self.group)
+            # a concurrent request still caches the entry under the current version
+            self.assertEqual(cache.get(AUTH_VERSION_KEY.format(self.user.pk)), version)
+        self.assertNotEqual(cache.get(AUTH_VERSION_KEY.format(self.user.pk)), version)
+        self.assertFalse(self.has_perm('humanresources.view_contract'))
+
+    def test_rolled_back(self):
+        self.assertTrue(self.has_perm('humanresources.view_contract'))
+        version = cache.get(AUTH_VERSION_KEY.format(self.user.pk))
+
+        try:
+            with transaction.atomic():
+                self.user.groups.remove(self.group)
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(cache.get(AUTH_VERSION_KEY.format(self.user.pk)), version)
+        self.assertTrue(self.has_perm('humanresources.view_contract'))
+
+    def test_user_permissions_changed(self):
+        self.assertFalse(self.has_perm('humanresources.change_contract'))
+        self.user.user_permissions.add(self.change)
+        self.assertTrue(self.has_perm('humanresources.change_contract'))
+
+    def test_group_deleted(self):
+        self.assertTrue(self.has_perm('humanresources.view_contract'))
+        self.group.delete()
+        self.assertFalse(self.has_perm('humanresources.view_contract'))
+
+    def test_permission_renamed(self):
+        self.assertTrue(self.has_perm('humanresources.view_contract'))
+        self.view.codename = 'read_contract'
+        self.view.save()
+        self.assertTrue(self.has_perm('humanresources.read_contract'))
+
+
+class ReceiversTests(TransactionTestCase):
+
+    def test_connected_with_the_backend_only(self):
+        self.assertFalse(connected())
+        with override_settings(AUTHENTICATION_BACKENDS=['permissions.backends.CachedModelBackend']):
+            self.assertTrue(connected())
+        self.assertFalse(connected())
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.contrib.auth.models import Group as AuthGroup
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from permissions.documents import DOCUMENTS_VERSION_KEY
+from permissions.documents import is_user_document
+
+
+class UserDocumentsTests(TransactionTestCase):
+    # the documents indexes are invalidated on commit
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='user')
+        self.group = AuthGroup.objects.create(name=settings.PROFILE_HUMAN_RESOURCES)
+        self.user.groups.add(self.group)
+        self.resolved = []
+
+    def resolver(self, user, path):
+        self.resolved.append(path)
+        return True
+
+    def assertResolved(self, count):
+        is_user_document(self.user, 'contracts/file.pdf', self.resolver)
+        self.assertEqual(len(self.resolved), count)
+
+    def test_cached(self):
+        self.assertResolved(1)
+        self.assertResolved(1)
+
+    def test_profile_group_renamed(self):
+        self.assertResolved(1)
+
+        self.group.name = 'former profile'
+        self.group.save()
+        self.assertResolved(2)
+
+        self.group.name = settings.PROFILE_HUMAN_RESOURCES
+        self.group.save()
+        self.assertResolved(3)
+
+    def test_invalidated_on_commit(self):
+        self.assertResolved(1)
+        version = cache.get(DOCUMENTS_VERSION_KEY.format(self.user.pk))
+
+        with transaction.atomic():
+            self.user.groups.remove(self.group)
+            # a concurrent request still indexes under the current version
+            self.assertEqual(cache.get(DOCUMENTS_VERSION_KEY.format(self.user.pk)), version)
+        self.assertResolved(2)
+
+    def test_other_group_renamed(self):
+        group = AuthGroup.objects.create(name='group')
+        self.user.groups.add(group)
+        self.assertResolved(1)
+
+        group.name = 'renamed group'
+        group.save()
+        self.assertResolved(1)
@@ -0,0 +1,79 @@
+from django.contrib.auth.models import Group as AuthGroup
+from django.contrib.auth.models import Permission as AuthPermission
+from django.contrib.auth.models import User
+from django.db import IntegrityError
+from django.db import transaction
+from django.test import TestCase
+from django.test import override_settings
+
+from people.models import Group as ResearchGroup
+
+from permissions.models import EffectivePermission
+from permissions.models import Permission as RankedPermission
+
+
+class EffectivePermissionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='user')
+        cls.view = AuthPermission.objects.get(codename='view_contract')
+
+        auth_group = AuthGroup.objects.create(name='group')
+        auth_group.permissions.add(cls.view)
+        cls.user.groups.add(auth_group)
+
+        research_group = ResearchGroup.objects.create(group_name='group')
+        RankedPermission.objects.create(auth_group=auth_group, researchgroup=research_group, ranking=10)
+        RankedPermission.objects.create(auth_group=auth_group, researchgroup=None, ranking=5)
+
+    def rows(self):
+        return set(EffectivePermission.objects.values_list('researchgroup', 'codename', 'ranking'))
+
+    def test_sync_users(self):
+        self.assertEqual(EffectivePermission.objects.sync_users([self.user.pk]), (2, 0))
+        self.assertEqual(EffectivePermission.objects.sync_users([self.user.pk]), (0, 0))
+        self.assertEqual(len(self.rows()), 2)
+        self.assertEqual(list(EffectivePermission.objects.differences()), [])
+
+    def test_unique_without_research_group(self):
+        EffectivePermission.objects.sync_users([self.user.pk])
+        row = EffectivePermission.objects.filter(researchgroup=None).get()
+        row.pk = None
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            row.save()
+
+
+@override_settings(PERMISSIONS_EFFECTIVE_PERMISSIONS=True)
+class EffectivePermissionSignalsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='user')
+        cls.auth_group = AuthGroup.objects.create(name='group')
+        cls.auth_group.permissions.add(AuthPermission.objects.get(codename='view_contract'))
+        cls.other = AuthGroup.objects.create(name='other')
+        cls.user.groups.add(cls.auth_group)
+
+    def setUp(self):
+        self.ranked = RankedPermission.objects.create(auth_group=self.auth_group, ranking=10)
+
+    def test_deferred_load(self):
+        with self.assertNumQueries(1):
+            list(RankedPermission.objects.only('ranking'))
+
+    def test_deferred_auth_group_replaced(self):
+        self.assertTrue(EffectivePermission.objects.filter(user=self.user).exists())
+
+        ranked = RankedPermission.objects.only('ranking').get(pk=self.ranked.pk)
+        ranked.auth_group = self.other
+        ranked.save()
+
+        # the members of the auth group the ranking was moved from
+        self.assertFalse(EffectivePermission.objects.filter(user=self.user).exists())
+        self.assertEqual(list(EffectivePermission.objects.differences()), [])
+
+    def test_cascade_delete(self):
+        AuthGroup.objects.get(pk=self.auth_group.pk).delete()
+        self.assertFalse(RankedPermission.objects.exists())
+        self.assertEqual(list(EffectivePermission.objects.differences()), [])
@@ -0,0 +1,191 @@
+import random
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import Group as AuthGroup
+from django.contrib.auth.models import Permission as AuthPermission
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import OuterRef
+from django.test import TestCase
+from django.test import override_settings
+
+from humanresources.models import Contract
+from orders.models import Order
+from people.models import Group as ResearchGroup
+from people.models import Person
+
+from permissions.models import EffectivePermission
+from permissions.models import Permission as RankedPermission
+
+
+CODENAMES = (
+    (Contract, ['view']),
+    (Contract, ['change', 'delete']),
+    (Order, ['view']),
+    (Order, ['app_access_orders']),
+)
+
+
+class RandomRankingsTestCase(TestCase):
+    """Random users, auth groups and rankings, including users without
+    groups and global rankings.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(7)
+
+        permissions = list(AuthPermission.objects.filter(
+            content_type__in=ContentType.objects.get_for_models(Contract, Order).values()))
+
+        research_groups = [
+            ResearchGroup.objects.create(group_name=f'group {i}') for i in range(4)]
+
+        auth_groups = []
+        for i in range(8):
+            auth_group = AuthGroup.objects.create(name=f'auth group {i}')
+            auth_group.permissions.set(rng.sample(permissions, rng.randint(0, 4)))
+            auth_groups.append(auth_group)
+
+            # global rankings have no research group
+            for researchgroup in rng.sample(research_groups + [None], rng.randint(1, 3)):
+                RankedPermission.objects.create(
+                    auth_group=auth_group,
+                    researchgroup=researchgroup,
+                    ranking=rng.randint(0, 100),
+                )
+
+        cls.users = []
+        for i in range(20):
+            user = User.objects.create(username=f'user{i}')
+            # the first users belong to no auth group
+            if i >= 3:
+                user.groups.set(rng.sample(auth_groups, rng.randint(1, 3)))
+
+            person = Person.objects.create(full_name=f'Person {i}', auth_user=user)
+            person.groups.set(rng.sample(research_groups, rng.randint(0, 2)))
+            Contract.objects.create(ref=f'C{i}', start=date(2020, 1, 1), person=person)
+
+            cls.users.append(user)
+
+
+class ExistsByAuthPermissionsTests(RandomRankingsTestCase):
+    """The EXISTS queries of PermissionQuerySet return the same rows as the
+    joins of `filter_by_auth_permissions`.
+    """
+
+    def test_with_auth_permissions(self):
+        for user in self.users:
+            for model, codenames in CODENAMES:
+                with self.subTest(user=user.username, model=model.__name__, codenames=codenames):
+                    legacy = RankedPermission.objects.filter_by_auth_permissions(user, model, codenames)
+                    exists = RankedPermission.objects.with_auth_permissions(user, model, codenames)
+                    self.assertEqual(
+                        set(exists.values_list('pk', flat=True)),
+                        set(legacy.values_list('pk', flat=True)),
+                    )
+
+    def test_correlated_listing(self):
+        for user in self.users:
+            with self.subTest(user=user.username):
+                ranked = RankedPermission.objects.filter_by_auth_permissions(user, Contract, ['view'])
+                legacy = Contract.objects.filter(person__groups__in=ranked.values('researchgroup'))
+
+                exists = Contract.objects.annotate(
+                    allowed=RankedPermission.objects.exists_by_auth_permissions(
+                        user, Contract, ['view'],
+                        researchgroup=OuterRef('person__groups'),
+                    )
+                ).filter(allowed=True)
+
+                self.assertEqual(
+                    set(exists.values_list('pk', flat=True)),
+                    set(legacy.values_list('pk', flat=True)),
+                )
+
+    def test_global_rankings(self):
+        for user in self.users:
+            with self.subTest(user=user.username):
+                legacy = RankedPermission.objects\
+                    .filter_by_auth_permissions(user, Contract, ['view'])\
+                    .filter(researchgroup=None).exists()
+
+                exists = User.objects.filter(pk=user.pk).annotate(
+                    allowed=RankedPermission.objects.exists_by_auth_permissions(
+                        user, Contract, ['view'], researchgroup=None),
+                ).values_list('allowed', flat=True).get()
+
+                self.assertEqual(exists, legacy)
+
+    def test_users_without_groups(self):
+        user = self.users[0]
+        self.assertFalse(RankedPermission.objects.with_auth_permissions(user, Contract, ['view']).exists())
+        self.assertFalse(RankedPermission.objects.filter_by_auth_permissions(user, Contract, ['view']).exists())
+
+    def test_codenames_not_mutated(self):
+        codenames = ['view', 'change']
+        RankedPermission.objects.filter_by_auth_permissions(self.users[5], Contract, codenames).count()
+        RankedPermission.objects.with_auth_permissions(self.users[5], Contract, codenames).count()
+        self.assertEqual(codenames, ['view', 'change'])
+
+    def test_single_query(self):
+        user = self.users[5]
+        # the content types are cached by filter_by_auth_permissions only
+        ContentType.objects.clear_cache()
+        with self.assertNumQueries(1):
+            list(RankedPermission.objects.with_auth_permissions(user, Contract, ['view']))
+
+
+class RanksByUserTests(RandomRankingsTestCase):
+    """`ranks_by_user` returns the highest rankings of the joins of
+    `filter_by_auth_permissions`, from the rankings or from the effective
+    permissions table.
+    """
+
+    def legacy_ranks(self, model, codenames):
+        ranks = {}
+        for user in self.users:
+            rows = RankedPermission.objects.filter_by_auth_permissions(user, model, codenames)
+            for researchgroup_id, ranking in rows.values_list('researchgroup', 'ranking'):
+                groups = ranks.setdefault(user.pk, {})
+                groups[researchgroup_id] = max(ranking, groups.get(researchgroup_id, ranking))
+        return ranks
+
+    def test_legacy_joins(self):
+        for model, codenames in CODENAMES:
+            with self.subTest(model=model.__name__, codenames=codenames):
+                self.assertEqual(
+                    RankedPermission.objects.ranks_by_user(User.objects.all(), model, codenames),
+                    self.legacy_ranks(model, codenames),
+                )
+
+    def test_users_and_ids(self):
+        expected = RankedPermission.objects.ranks_by_user(User.objects.all(), Contract, ['view'])
+        self.assertEqual(RankedPermission.objects.ranks_by_user(self.users, Contract, ['view']), expected)
+
+        ids = [user.pk for user in self.users]
+        with mock.patch('permissions.models.permission_queryset.RANKS_BATCH_SIZE', 3):
+            with self.assertNumQueries(7):
+                ranks = RankedPermission.objects.ranks_by_user(ids, Contract, ['view'])
+        self.assertEqual(ranks, expected)
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            RankedPermission.objects.ranks_by_user(User.objects.all(), Contract, ['view'])
+
+    def test_effective_permissions(self):
+        EffectivePermission.objects.rebuild()
+
+        for model, codenames in CODENAMES:
+            with self.subTest(model=model.__name__, codenames=codenames):
+                expected = RankedPermission.objects.ranks_by_user(User.objects.all(), model, codenames)
+                with override_settings(PERMISSIONS_EFFECTIVE_PERMISSIONS=True):
+                    self.assertEqual(
+                        RankedPermission.objects.ranks_by_user(User.objects.all(), model, codenames),
+                        expected,
+                    )
+                    self.assertEqual(
+                        EffectivePermission.objects.ranks_by_user(self.users, model, codenames),
+                        expected,
+                    )
@@ -0,0 +1,106 @@
+from django.contrib.auth.models import Group as AuthGroup
+from django.contrib.auth.models import Permission as AuthPermission
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase
+
+from people.models import Group as ResearchGroup
+
+from permissions.models import Permission as RankedPermission
+from permissions.models.permissions_summary import summary_models
+
+
+COLUMNS = ('order', 'person', 'proposal', 'contract', 'publication')
+
+PAGE_SIZE = 30
+
+
+class PermissionsSummaryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        permissions = list(AuthPermission.objects.filter(
+            content_type__in=ContentType.objects.get_for_models(*summary_models()).values()))
+
+        research_group = ResearchGroup.objects.create(group_name='group')
+        for i in range(PAGE_SIZE):
+            auth_group = AuthGroup.objects.create(name=f'auth group {i}')
+            auth_group.permissions.set(permissions[i % len(permissions)::7])
+            RankedPermission.objects.create(
+                auth_group=auth_group, researchgroup=research_group, ranking=i)
+
+    def setUp(self):
+        cache.clear()
+        # the content types are cached for the process
+        ContentType.objects.get_for_models(*summary_models())
+
+    def render_page(self):
+        """Render the permissions columns of a page of the list."""
+        rows = RankedPermission.objects\
+            .select_related('auth_group', 'researchgroup')\
+            .with_permissions_summary()[:PAGE_SIZE]
+        return {row.pk: [getattr(row, column) for column in COLUMNS] for row in rows}
+
+    def test_page_queries(self):
+        # the rows, then the catalogue and the groups permissions
+        with self.assertNumQueries(1 + 2):
+            cold = self.render_page()
+        self.assertEqual(len(cold), PAGE_SIZE)
+
+        # the rows only
+        with self.assertNumQueries(1):
+            warm = self.render_page()
+        self.assertEqual(warm, cold)
+
+    def test_rendered_permissions(self):
+        ranked = RankedPermission.objects.select_related('auth_group').first()
+        granted = ranked.auth_group.permissions.filter(content_type__model='contract')
+
+        html = self.render_page()[ranked.pk][COLUMNS.index('contract')]
+        for permission in AuthPermission.objects.filter(content_type__model='contract'):
+            icon = 'check circle green' if permission in granted else 'times circle red'
+            self.assertIn(f"<i class='{icon}  icon'></i>{permission.name}", html)
+
+    def test_permissions_changed(self):
+        self.render_page()
+
+        ranked = RankedPermission.objects.select_related('auth_group').first()
+        permission = AuthPermission.objects.get(codename='change_contract')
+        ranked.auth_group.permissions.add(permission)
+
+        # only the auth group whose permissions changed is rendered again
+        with self.assertNumQueries(1 + 2):
+            html = self.render_page()[ranked.pk][COLUMNS.index('contract')]
+        self.assertIn(f"<i class='check circle green  icon'></i>{permission.name}", html)
+
+        ranked.auth_group.permissions.remove(permission)
+        html = self.render_page()[ranked.pk][COLUMNS.index('contract')]
+        self.assertIn(f"<i class='times circle red  icon'></i>{permission.name}", html)
+
+        ranked.auth_group.permissions.clear()
+        html = self.render_page()[ranked.pk][COLUMNS.index('contract')]
+        self.assertNotIn('check circle green', html)
+
+    def test_reverse_permissions_changed(self):
+        self.render_page()
+
+        ranked = RankedPermission.objects.select_related('auth_group').first()
+        permission = AuthPermission.objects.get(codename='delete_contract')
+        permission.group_set.add(ranked.auth_group)
+
+        html = self.render_page()[ranked.pk][COLUMNS.index('contract')]
+        self.assertIn(f"<i class='check circle green  icon'></i>{permission.name}", html)
+
+        permission.group_set.clear()
+        html = self.render_page()[ranked.pk][COLUMNS.index('contract')]
+        self.assertIn(f"<i class='times circle red  icon'></i>{permission.name}", html)
+
+    def test_catalogue_changed(self):
+        self.render_page()
+
+        permission = AuthPermission.objects.get(codename='view_contract')
+        permission.name = 'Can read contract'
+        permission.save()
+
+        html = self.render_page()[RankedPermission.objects.first().pk][COLUMNS.index('contract')]
+        self.assertIn('Can read contract', html)
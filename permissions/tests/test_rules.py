@@ -0,0 +1,62 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from permissions.rules import DENIED
+from permissions.rules import PROTECTED
+from permissions.rules import PUBLIC
+from permissions.rules import PathRules
+from permissions.rules import normalize_media_path
+
+
+def owner(user, path):
+    return True
+
+
+class PathRulesTests(SimpleTestCase):
+
+    def setUp(self):
+        self.rules = PathRules([
+            ('uploads/image', PUBLIC),
+            ('uploads/contracts', PROTECTED, owner),
+            ('uploads/contracts/archive', DENIED),
+        ])
+
+    def assertAccess(self, path, access):
+        self.assertEqual(self.rules.match(path).access, access)
+
+    def test_longest_root(self):
+        self.assertAccess('uploads/image/a.png', PUBLIC)
+        self.assertAccess('uploads/contracts/a.pdf', PROTECTED)
+        self.assertAccess('uploads/contracts/archive/a.pdf', DENIED)
+        self.assertEqual(self.rules.match('uploads/contracts/a.pdf').resolver, owner)
+
+    def test_not_covered(self):
+        self.assertAccess('uploads/a.pdf', DENIED)
+        self.assertAccess('uploads/imagery/a.png', DENIED)
+        self.assertAccess('', DENIED)
+
+    def test_traversal(self):
+        self.assertAccess('uploads/image/../contracts/a.pdf', PROTECTED)
+        self.assertAccess('uploads/image/./../../uploads/contracts/archive/a.pdf', DENIED)
+        self.assertAccess('uploads/contracts/archive/../a.pdf', PROTECTED)
+        self.assertAccess('uploads/image//a.png', PUBLIC)
+
+    def test_outside_the_media_root(self):
+        for path in ('..', '../uploads/image/a.png', 'uploads/image/../../../a.png', '/uploads/image/a.png'):
+            with self.subTest(path=path):
+                self.assertAccess(path, DENIED)
+                self.assertIsNone(normalize_media_path(path))
+
+        # a file name starting with dots stays inside the root
+        self.assertEqual(normalize_media_path('uploads/image/..a.png'), 'uploads/image/..a.png')
+
+    def test_catch_all_root(self):
+        rules = PathRules([('', PROTECTED, owner), ('uploads/image', PUBLIC)])
+        self.assertEqual(rules.match('other/a.pdf').access, PROTECTED)
+        self.assertEqual(rules.match('uploads/image/../../../a.pdf').access, DENIED)
+
+    def test_invalid_rules(self):
+        with self.assertRaises(ImproperlyConfigured):
+            PathRules([('uploads', 'private')])
+        with self.assertRaises(ImproperlyConfigured):
+            PathRules([('uploads', PROTECTED)])
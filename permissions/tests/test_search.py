@@ -0,0 +1,87 @@
+from django.contrib.auth.models import Group as AuthGroup
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.test import TestCase
+from django.test import TransactionTestCase
+
+from people.models import Group as ResearchGroup
+
+from permissions.profile_sync import ProfileSync
+from permissions.search import AUTH_GROUPS_INDEX
+from permissions.search import PrefixIndex
+from permissions.search import USERS_INDEX
+from permissions.search import get_index
+from permissions.search import search_queryset
+
+
+class PrefixIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.index = PrefixIndex([
+            (1, 'jsmith', ['John', 'Smith']),
+            (2, 'john.doe', ['John', 'Doe']),
+            (3, 'ann-smith', ['Ann', 'Smith']),
+        ])
+
+    def test_ranking(self):
+        # exact name, name prefix, then token prefix
+        self.assertEqual(self.index.search('jsmith'), [1])
+        self.assertEqual(self.index.search('john'), [2, 1])
+
+    def test_every_token_matches(self):
+        self.assertEqual(self.index.search('smith ann'), [3])
+        self.assertEqual(self.index.search('john smi'), [1])
+
+    def test_separators_only(self):
+        for keyword in ('-', '.', '_', ' - ', ''):
+            with self.subTest(keyword=keyword):
+                self.assertEqual(self.index.search(keyword), [])
+
+
+def no_fallback(queryset, keyword):
+    raise AssertionError('the index is enabled')
+
+
+class SearchQuerysetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create([User(username=f'user{i:02}') for i in range(30)])
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, queryset, keyword, **kwargs):
+        return list(search_queryset(queryset, USERS_INDEX, keyword, no_fallback, **kwargs)
+                    .values_list('username', flat=True))
+
+    def test_best_matches_first(self):
+        self.assertEqual(self.search(User.objects.all(), 'user1', limit=3), ['user10', 'user11', 'user12'])
+
+    def test_filters_applied_before_the_limit(self):
+        # the matches of the filtered queryset are not in the global top matches
+        queryset = User.objects.filter(username__gte='user25')
+        self.assertEqual(self.search(queryset, 'user', limit=3), ['user25', 'user26', 'user27'])
+        self.assertEqual(self.search(queryset.filter(username='user29'), 'user'), ['user29'])
+
+    def test_no_match(self):
+        self.assertEqual(self.search(User.objects.filter(username='user01'), 'user2'), [])
+
+
+class SearchIndexTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bulk_profiles_sync(self):
+        ResearchGroup.objects.create(group_name='Lab')
+        self.assertEqual(get_index(AUTH_GROUPS_INDEX).search('profile'), [])
+
+        sync = ProfileSync(ResearchGroup.objects.all(), default=True)
+        sync.plan()
+        sync.apply()
+
+        created = AuthGroup.objects.filter(name__startswith='PROFILE').values_list('pk', flat=True)
+        self.assertTrue(created)
+        self.assertEqual(sorted(get_index(AUTH_GROUPS_INDEX).search('profile')), sorted(created))
@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+
+from django.test import RequestFactory
+from django.test import SimpleTestCase
+from django.test import override_settings
+
+from permissions.serving import serve_media
+
+
+CONTENT = b'0123456789' * 10
+
+
+class ServeMediaTests(SimpleTestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        os.makedirs(os.path.join(self.media_root, 'uploads'))
+        with open(os.path.join(self.media_root, 'uploads', 'file.pdf'), 'wb') as fd:
+            fd.write(CONTENT)
+
+        self.factory = RequestFactory()
+
+    def get(self, public=False, **headers):
+        request = self.factory.get('/media/uploads/file.pdf', **headers)
+        return serve_media(request, 'uploads/file.pdf', self.media_root, public=public)
+
+    def content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_validators(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), CONTENT)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_if_none_match(self):
+        etag = self.get()['ETag']
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        last_modified = self.get()['Last-Modified']
+        response = self.get(HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_range(self):
+        response = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(self.content(response), CONTENT[10:20])
+
+    def test_open_range(self):
+        response = self.get(HTTP_RANGE='bytes=90-')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 90-99/100')
+        self.assertEqual(self.content(response), CONTENT[90:])
+
+    def test_suffix_range(self):
+        response = self.get(HTTP_RANGE='bytes=-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 95-99/100')
+        self.assertEqual(self.content(response), CONTENT[95:])
+
+    def test_range_past_the_end(self):
+        response = self.get(HTTP_RANGE='bytes=90-200')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 90-99/100')
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_invalid_range_is_ignored(self):
+        for header in ('bytes=5-3', 'bytes=a-b', 'items=0-1', 'bytes=0-1,5-6'):
+            with self.subTest(header=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.content(response), CONTENT)
+
+    def test_if_range(self):
+        etag = self.get()['ETag']
+
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"changed"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), CONTENT)
+
+    def test_cache_control(self):
+        public = self.get(public=True)['Cache-Control']
+        self.assertIn('public', public)
+        self.assertIn('max-age=2592000', public)
+
+        protected = self.get()['Cache-Control']
+        self.assertIn('private', protected)
+        self.assertIn('must-revalidate', protected)
+        self.assertIn('max-age=0', protected)
+
+    @override_settings(
+        PERMISSIONS_MEDIA_BACKEND='x-accel-redirect',
+        PERMISSIONS_MEDIA_INTERNAL_URL='/protected/',
+    )
+    def test_x_accel_redirect(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/uploads/file.pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response.content, b'')
+        self.assertIn('private', response['Cache-Control'])
+
+    @override_settings(PERMISSIONS_MEDIA_BACKEND='x-sendfile')
+    def test_x_sendfile(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(self.media_root, 'uploads', 'file.pdf'))
+        self.assertEqual(response.content, b'')
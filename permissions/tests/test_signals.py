@@ -0,0 +1,45 @@
+from django.test import TestCase
+
+from people.models import Group as ResearchGroup
+from people.models import Person
+
+from permissions.models import DirtyResearchGroup
+
+
+class ResearchGroupChangesTests(TestCase):
+
+    def setUp(self):
+        self.head = Person.objects.create(full_name='Head')
+        self.group = ResearchGroup.objects.create(group_name='group', person=self.head)
+        DirtyResearchGroup.objects.all().delete()
+
+    def dirty(self):
+        return list(DirtyResearchGroup.objects.values_list('researchgroup', flat=True))
+
+    def test_changed(self):
+        group = ResearchGroup.objects.get(pk=self.group.pk)
+        group.save()
+        self.assertEqual(self.dirty(), [])
+
+        group.group_name = 'renamed'
+        group.save()
+        self.assertEqual(self.dirty(), [self.group.pk])
+
+    def test_deferred_load(self):
+        with self.assertNumQueries(1):
+            groups = list(ResearchGroup.objects.only('group_name'))
+        self.assertEqual(len(groups), 1)
+
+        groups[0].save()
+        self.assertEqual(self.dirty(), [])
+
+    def test_deferred_field_set(self):
+        group = ResearchGroup.objects.only('group_name').get(pk=self.group.pk)
+        group.person = None
+        group.save()
+        self.assertEqual(self.dirty(), [self.group.pk])
+
+    def test_cascade_delete(self):
+        # the collector loads the groups headed by the person with .only()
+        self.head.delete()
+        self.assertIsNone(ResearchGroup.objects.get(pk=self.group.pk).person)
@@ -0,0 +1,44 @@
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.auth.models import User
+from django.core.exceptions import PermissionDenied
+from django.test import RequestFactory
+from django.test import TestCase
+from django.test import override_settings
+
+from permissions.views import permissions_metrics
+
+
+@override_settings(PERMISSIONS_INSTRUMENTATION=True, PERMISSIONS_METRICS_TOKEN='secret')
+class PermissionsMetricsTests(TestCase):
+
+    def get(self, user=None, **headers):
+        request = RequestFactory().get('/permissions/metrics', **headers)
+        if user is not None:
+            request.user = user
+        return permissions_metrics(request)
+
+    def test_staff(self):
+        for flags in ({'is_staff': True}, {'is_superuser': True}):
+            with self.subTest(**flags):
+                user = User.objects.create(username=str(flags), **flags)
+                self.assertEqual(self.get(user).status_code, 200)
+
+    def test_bearer_token(self):
+        self.assertEqual(self.get(HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    def test_denied(self):
+        user = User.objects.create(username='user')
+        for user, headers in (
+            (user, {}),
+            (AnonymousUser(), {}),
+            (None, {'HTTP_AUTHORIZATION': 'Bearer wrong'}),
+            (None, {'REMOTE_ADDR': '127.0.0.1'}),
+        ):
+            with self.subTest(user=user, headers=headers):
+                with self.assertRaises(PermissionDenied):
+                    self.get(user, **headers)
+
+    @override_settings(PERMISSIONS_METRICS_TOKEN=None)
+    def test_no_token_configured(self):
+        with self.assertRaises(PermissionDenied):
+            self.get(HTTP_AUTHORIZATION='Bearer ')
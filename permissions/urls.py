@@ -16,7 +16,9 @@ Including another URLconf
 from django.conf import settings
 from django.urls import path
 from .views import media_access
+from .views import permissions_metrics
 
 urlpatterns = [
+    path('permissions/metrics', permissions_metrics),
     path('%s<path:path>' % settings.MEDIA_URL[1:], media_access, {'document_root': settings.MEDIA_ROOT}),
 ]
\ No newline at end of file
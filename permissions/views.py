@@ -1,90 +1,80 @@
+import hmac
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
-from django.db.models import Q
-from django.views.static import serve
-
-
-
-
-def _get_user_documents(user):
-    """Utililty method to list all documents that can be accessed by a user.
-    A return value of '*' means access to all documents.
-    """
-    try:
-        from humanresources.models import ContractFile
-        from humanresources.models import PrivateInfo
-        from orders.models import OrderFile
-    except:
-        pass
-
-    documents = []
-
-    if user.groups.filter(name=settings.PROFILE_HUMAN_RESOURCES).exists():
-        return '*'
-
-    person = user.person_user.first()
-
-    # contract files
-    contract_files = ContractFile.objects.filter(
-        Q(contract__person=person) | Q(contract__supervisor=person))
-    contract_files = [obj.contractfile_file.name for obj in contract_files]
-    documents += contract_files
-
-    # CV is present both in PrivateInfo and Person tables (!)
-    try:
-        privateinfo = PrivateInfo.objects.get(person=person)
-    except PrivateInfo.DoesNotExist:
-        privateinfo_cv = ''
-    else:
-        privateinfo_cv = privateinfo.privateinfo_cv.name
-
-    cv_files = [privateinfo_cv, person.person_cv.name]
-    documents += list(filter(None, cv_files))
-
-    # Orders attachments
-    if user.groups.filter(name=settings.APP_PROFILE_ALL_ORDERS).exists():
-        order_files = OrderFile.objects.all()
-    else:
-        order_files = OrderFile.objects.filter(createdby=user)
-    documents += list(of.file.name for of in order_files)
-
-    return documents
-
-
+from django.http import Http404
+from django.http import HttpResponse
+
+from .authorization import authorize
+from .instrumentation import enabled as instrumentation_enabled
+from .instrumentation import get_snapshot
+from .instrumentation import instrumented
+from .instrumentation import render_text
+from .rules import PROTECTED
+from .rules import PUBLIC
+from .rules import match_media_rule
+from .rules import normalize_media_path
+from .serving import serve_media
+
+
+@instrumented('media_access')
 @login_required
 def media_access(request, path, document_root=None):
     """
     Protect all media files by default.
 
-    Add the root of a path to `public_media_paths` to allow to everyone.
-
-    Add the root of a path to `protected_media_paths` to allow check if
-    the user has access to it.
+    The access to each path root is configured in the
+    `PERMISSIONS_MEDIA_RULES` setting, see `permissions.rules`.
+    Authorized files are sent by the backend selected in the
+    `PERMISSIONS_MEDIA_BACKEND` setting, see `permissions.serving`.
     """
+    user = request.user
 
-    public_media_paths = (
-        'cache',
-        'uploads/image',
-        'uploads/person/person_img',
-        'uploads/group/group_img',
-        'uploads/publication/publication_file',
-    )
+    path = normalize_media_path(path)
+    if path is None:
+        raise PermissionDenied()
 
-    user = request.user
+    rule = match_media_rule(path)
 
     access_granted = False
 
-    if user.is_superuser or path.startswith(public_media_paths):
+    if user.is_superuser or rule.access == PUBLIC:
         access_granted = True
 
-    else:
-        user_documents = _get_user_documents(user)
-
-        if user_documents == '*' or path in user_documents:
-            access_granted = True
+    elif rule.access == PROTECTED:
+        access_granted = authorize(user, path, document_root, rule.resolver)
 
     if access_granted:
-        return serve(request, path, document_root)
+        return serve_media(request, path, document_root, public=rule.access == PUBLIC)
     else:
-        raise PermissionDenied()
\ No newline at end of file
+        raise PermissionDenied()
+
+
+def _metrics_authorized(request):
+    """Staff users, or the scrapers sending the `PERMISSIONS_METRICS_TOKEN`
+    setting as a bearer token.
+    """
+    token = getattr(settings, 'PERMISSIONS_METRICS_TOKEN', None)
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and header.startswith('Bearer '):
+        if hmac.compare_digest(header[len('Bearer '):].encode(), token.encode()):
+            return True
+
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_authenticated and (user.is_superuser or user.is_staff)
+
+
+def permissions_metrics(request):
+    """
+    Histograms of the instrumented operations in the Prometheus text format,
+    for staff users and the bearer of the `PERMISSIONS_METRICS_TOKEN` setting.
+    """
+    if not instrumentation_enabled():
+        raise Http404('The permissions instrumentation is disabled')
+
+    if not _metrics_authorized(request):
+        raise PermissionDenied()
+
+    snapshot = get_snapshot() or {'operations': {}, 'caches': {}}
+    return HttpResponse(render_text(snapshot), content_type='text/plain; version=0.0.4; charset=utf-8')